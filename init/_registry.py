@@ -0,0 +1,146 @@
+"""
+Shared registry (`mods.json`) accessors for the init step scripts.
+
+cleanup.py, download.py and update_server_ini.py all derive the same enabled
+workshop IDs / ordered mod IDs from the registry, and all read and write it
+through the same JSON helpers and read the same boolean env flags; keep that
+logic here so the steps cannot drift apart.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import orjson
+except ImportError:  # optional accelerator; stdlib json is the fallback
+    orjson = None
+
+
+def load_json(path: Path) -> Dict[str, Any]:
+    """Parse a JSON file; a fresh object on every call, never shared."""
+    raw = path.read_bytes()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def dump_json(data: Dict[str, Any]) -> bytes:
+    # Always the stdlib serializer: orjson escapes and formats differently, and
+    # mods.json must not change bytes depending on which one is installed.
+    return (json.dumps(data, indent=2, sort_keys=False, ensure_ascii=True) + "\n").encode("ascii")
+
+
+def _file_digest(path: Path, size: int) -> Optional[bytes]:
+    """blake2b digest of path's contents, or None if it is missing or not `size` bytes."""
+    try:
+        if path.stat().st_size != size:
+            return None
+        h = hashlib.blake2b(digest_size=16)
+        with path.open("rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 16), b""):
+                h.update(chunk)
+        return h.digest()
+    except OSError:
+        return None
+
+
+def save_json(path: Path, data: Dict[str, Any], *, durable: bool = False) -> bool:
+    """
+    Atomically replace path via a sibling `.tmp` file.
+
+    With durable=True the file is fsynced before the swap and the parent dir after
+    it; otherwise the rename alone is relied on. Returns False (and writes
+    nothing) when path already holds exactly the serialized data.
+    """
+    blob = dump_json(data)
+    if _file_digest(path, len(blob)) == hashlib.blake2b(blob, digest_size=16).digest():
+        return False
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with tmp.open("wb") as fh:
+        fh.write(blob)
+        if durable:
+            fh.flush()
+            os.fsync(fh.fileno())
+    os.replace(tmp, path)
+    if durable:
+        dir_fd = os.open(path.parent, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    return True
+
+
+def enabled_workshop_ids(reg: Dict[str, Any], *, numeric_only: bool = False) -> List[str]:
+    """
+    Workshop IDs (registry order, de-duplicated) that have at least one enabled mod.
+
+    With numeric_only=True, non-numeric workshop IDs are dropped.
+    """
+    mods_root = reg.get("mods")
+    if not isinstance(mods_root, list):
+        return []
+
+    out: Dict[str, None] = {}
+    for item in mods_root:
+        if not isinstance(item, dict):
+            continue
+        wid = str(item.get("workshopId", "")).strip()
+        if not wid or wid in out:
+            continue
+        if numeric_only and not wid.isdecimal():
+            continue
+        if any(
+            isinstance(m, dict) and m.get("enabled") and str(m.get("id", "")).strip()
+            for m in (item.get("mods") or ())
+        ):
+            out[wid] = None
+    return list(out)
+
+
+def ordered_mod_ids(reg: Dict[str, Any]) -> List[str]:
+    """Enabled mod IDs in registry order, de-duplicated."""
+    mods_root = reg.get("mods")
+    if not isinstance(mods_root, list):
+        return []
+
+    def _enabled_ids() -> Iterator[str]:
+        for item in mods_root:
+            if not isinstance(item, dict):
+                continue
+            for meta in (item.get("mods") or ()):
+                if isinstance(meta, dict) and meta.get("enabled"):
+                    s = str(meta.get("id", "")).strip()
+                    if s:
+                        yield s
+
+    return list(dict.fromkeys(_enabled_ids()))
+
+
+def workshop_content_root(reg: Dict[str, Any], override: Optional[Path] = None) -> Optional[Path]:
+    """
+    Resolve the workshop content root shared by the init steps.
+
+    Precedence: explicit override, then `WORKSHOP_CONTENT_ROOT` (exported by
+    pipeline.sh), then `registry.workshop.contentRoot`.
+    """
+    if override is not None:
+        return override
+    env_root = os.environ.get("WORKSHOP_CONTENT_ROOT", "").strip()
+    if env_root:
+        return Path(env_root)
+    workshop = reg.get("workshop")
+    root = workshop.get("contentRoot") if isinstance(workshop, dict) else None
+    return Path(str(root)) if root else None
+
+
+def as_bool_env(name: str, default: bool) -> bool:
+    v = os.environ.get(name, "")
+    if not v.strip():
+        return default
+    return v.strip().lower() in ("1", "true", "yes", "y", "on")
@@ -9,13 +9,19 @@ Writes cleanup bookkeeping under `resolution.cleanup`.
 from __future__ import annotations
 
 import argparse
-import json
+import copy
+import importlib.util
 import os
 import shutil
+import subprocess
 import sys
-from datetime import datetime, timezone
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from typing import AbstractSet, Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from _registry import as_bool_env, enabled_workshop_ids, load_json, save_json, workshop_content_root
 
 
 def log(msg: str) -> None:
@@ -31,124 +37,116 @@ def err(msg: str) -> None:
 
 
 def utc_now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-
-def load_json(path: Path) -> Dict[str, Any]:
-    return json.loads(path.read_text(encoding="utf-8"))
-
-
-def save_json(path: Path, data: Dict[str, Any]) -> None:
-    tmp = path.with_suffix(path.suffix + ".tmp")
-    with tmp.open("w", encoding="utf-8") as fh:
-        json.dump(data, fh, indent=2, sort_keys=False)
-        fh.write("\n")
-    tmp.replace(path)
+    t = time.time()
+    base = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(t))
+    return f"{base}.{int((t % 1) * 1e6):06d}+00:00"
 
 
 def default_registry_path() -> Path:
     return Path(__file__).resolve().parent / "mods.json"
 
 
-def unique_preserve_order(items: Iterable[Any]) -> List[str]:
-    seen: Set[str] = set()
-    out: List[str] = []
-    for x in items:
-        s = str(x).strip()
-        if not s or s in seen:
-            continue
-        seen.add(s)
-        out.append(s)
+@dataclass(frozen=True)
+class WorkshopEntry:
+    """A workshop item dir (or symlink) with its type bits captured once from scandir."""
+
+    name: str
+    path: Path
+    is_symlink: bool
+    is_dir: bool
+
+
+def list_item_dirs(content_root: Path) -> List[WorkshopEntry]:
+    """
+    List workshop item dirs (and symlinks) under content_root.
+
+    Uses `os.scandir` so directory/symlink checks come from the dirent type
+    instead of a separate stat per entry.
+    """
+    out: List[WorkshopEntry] = []
+    try:
+        with os.scandir(content_root) as it:
+            for entry in it:
+                try:
+                    is_symlink = entry.is_symlink()
+                    is_dir = entry.is_dir()
+                except OSError:
+                    # Keep unreadable entries so they are still considered for pruning.
+                    is_symlink, is_dir = False, True
+                if is_symlink or is_dir:
+                    out.append(WorkshopEntry(entry.name, Path(entry.path), is_symlink, is_dir))
+    except (FileNotFoundError, NotADirectoryError):
+        return []
     return out
 
 
-def enabled_workshop_ids_from_registry(reg: Dict[str, Any]) -> List[str]:
-    mods_root = reg.get("mods")
-    if not isinstance(mods_root, list):
-        return []
+def _fast_rmtree(path: Path) -> None:
+    """
+    Remove a directory tree, preferring the native `rm -rf` when FAST_RMTREE is on.
 
-    out: List[str] = []
-    for item in mods_root:
-        if not isinstance(item, dict):
-            continue
-        wid = str(item.get("workshopId", "")).strip()
-        enabled_mod_ids = [
-            str(m.get("id", "")).strip()
-            for m in (item.get("mods") or [])
-            if isinstance(m, dict)
-            and bool(m.get("enabled", False))
-            and str(m.get("id", "")).strip()
-        ]
-        if wid and enabled_mod_ids:
-            out.append(wid)
-    return unique_preserve_order(out)
-
-
-def as_bool_env(name: str, default: bool) -> bool:
-    v = os.environ.get(name, "")
-    if not v.strip():
-        return default
-    return v.strip().lower() in ("1", "true", "yes", "y", "on")
-
-
-def list_item_dirs(content_root: Path) -> List[Path]:
-    if not content_root.is_dir():
-        return []
-    out: List[Path] = []
-    for p in content_root.iterdir():
-        try:
-            if p.is_dir() or p.is_symlink():
-                out.append(p)
-        except OSError:
-            out.append(p)
-    return out
+    Workshop items can hold thousands of small files; `rm` avoids the per-entry
+    Python dispatch of `shutil.rmtree`. Falls back to `shutil.rmtree` when `rm`
+    is unavailable or fails.
+    """
+    if as_bool_env("FAST_RMTREE", False) and shutil.which("rm"):
+        proc = subprocess.run(["rm", "-rf", "--", str(path)], check=False)
+        if proc.returncode == 0:
+            return
+    try:
+        shutil.rmtree(path)
+    except FileNotFoundError:
+        pass
 
 
 def prune_workshop_dirs(
     *,
-    content_root: Path,
+    entries: Sequence[WorkshopEntry],
     keep_ids: Set[str],
     dry_run: bool,
 ) -> Tuple[List[str], List[str]]:
     pruned: List[str] = []
     kept: List[str] = []
+    rm_targets: List[Path] = []
 
-    for item_path in sorted(list_item_dirs(content_root), key=lambda p: p.name):
-        item_id = item_path.name
+    for entry in entries:
+        item_id = entry.name
         if item_id in keep_ids:
             kept.append(item_id)
             continue
 
-        if not (item_path.is_dir() or item_path.is_symlink()):
-            continue
-
+        item_path = entry.path
         pruned.append(item_id)
         if dry_run:
             log(f"dry-run: would prune stale workshop item dir: {item_path}")
             continue
 
         log(f"prune: removing stale workshop item dir: {item_path}")
-        try:
-            if item_path.is_symlink() or item_path.is_file():
-                item_path.unlink(missing_ok=True)
-            else:
-                shutil.rmtree(item_path)
-        except TypeError:
+        if entry.is_symlink:
             try:
-                if item_path.is_symlink() or item_path.is_file():
-                    item_path.unlink()
-                else:
-                    shutil.rmtree(item_path)
+                item_path.unlink()
             except FileNotFoundError:
                 pass
-        except Exception as ex:
-            warn(f"failed to prune {item_path}: {ex}")
-
+            except Exception as ex:
+                warn(f"failed to prune {item_path}: {ex}")
+        else:
+            rm_targets.append(item_path)
+
+    if rm_targets:
+        with ThreadPoolExecutor(max_workers=min(8, len(rm_targets))) as pool:
+            futures = {pool.submit(_fast_rmtree, p): p for p in rm_targets}
+            for fut, item_path in futures.items():
+                try:
+                    fut.result()
+                except Exception as ex:
+                    warn(f"failed to prune {item_path}: {ex}")
+
+    pruned.sort()
     return pruned, kept
 
 
-def verify_workshop_dirs(content_root: Path, desired_ids: Sequence[str]) -> List[str]:
-    return [wid for wid in desired_ids if not (content_root / wid).is_dir()]
+def verify_workshop_dirs(present: AbstractSet[str], desired_ids: Sequence[str]) -> List[str]:
+    """Desired IDs with no item dir, checked against names already listed by scandir."""
+    return [wid for wid in desired_ids if wid not in present]
 
 
 def find_manifest_path(workshop_appid: str) -> Optional[Path]:
@@ -159,6 +157,26 @@ def find_manifest_path(workshop_appid: str) -> Optional[Path]:
     return steamappdir / "steamapps" / "workshop" / f"appworkshop_{workshop_appid}.acf"
 
 
+_MANIFEST_HELPERS: Dict[Path, Any] = {}
+
+
+def _load_manifest_helper(helper_script: Path) -> Any:
+    """Import the manifest prune helper once per process; None if it cannot be loaded."""
+    key = helper_script.resolve()
+    if key not in _MANIFEST_HELPERS:
+        mod = None
+        spec = importlib.util.spec_from_file_location("pz_prune_workshop_manifest", key)
+        if spec is not None and spec.loader is not None:
+            mod = importlib.util.module_from_spec(spec)
+            try:
+                spec.loader.exec_module(mod)
+            except Exception as ex:
+                warn(f"failed to import manifest prune helper {helper_script}: {ex}")
+                mod = None
+        _MANIFEST_HELPERS[key] = mod
+    return _MANIFEST_HELPERS[key]
+
+
 def prune_manifest_best_effort(
     *,
     manifest_path: Path,
@@ -178,7 +196,15 @@ def prune_manifest_best_effort(
         warn("manifest prune helper script not found; skipping manifest pruning")
         return False
 
-    import subprocess
+    helper = _load_manifest_helper(helper_script)
+    if helper is not None and callable(getattr(helper, "prune", None)):
+        log(f"manifest: pruning in-process with helper: {helper_script}")
+        try:
+            helper.prune(manifest_path, list(keep_ids))
+        except Exception as ex:
+            warn(f"manifest prune failed for {manifest_path}: {ex}")
+            return False
+        return True
 
     cmd = [sys.executable, str(helper_script), str(manifest_path), *list(keep_ids)]
     log(f"manifest: pruning with helper: {' '.join(cmd)}")
@@ -186,6 +212,23 @@ def prune_manifest_best_effort(
     return proc.returncode == 0
 
 
+def _save_registry(
+    registry_path: Path,
+    reg: Dict[str, Any],
+    prev_cleanup: Any,
+    *,
+    durable: bool = False,
+) -> None:
+    """
+    Save the registry, bumping `generatedAt` only when the cleanup section changed.
+
+    An unchanged registry serializes to the same bytes and save_json skips the write.
+    """
+    if reg["resolution"]["cleanup"] != prev_cleanup or "generatedAt" not in reg:
+        reg["generatedAt"] = utc_now_iso()
+    save_json(registry_path, reg, durable=durable)
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     ap = argparse.ArgumentParser(
         description="Init step: prune and verify workshop cache based on mods registry."
@@ -202,7 +245,7 @@ def main(argv: Sequence[str] | None = None) -> int:
         "--content-root",
         type=Path,
         default=None,
-        help="Workshop content root (overrides registry.workshop.contentRoot).",
+        help="Workshop content root (overrides env WORKSHOP_CONTENT_ROOT and registry.workshop.contentRoot).",
     )
     ap.add_argument("--dry-run", action="store_true")
     ap.add_argument(
@@ -231,30 +274,27 @@ def main(argv: Sequence[str] | None = None) -> int:
         return 2
 
     reg = load_json(registry_path)
-    desired_ids = enabled_workshop_ids_from_registry(reg)
+    desired_ids = enabled_workshop_ids(reg)
     keep_ids = set(desired_ids)
 
     workshop = reg.get("workshop", {}) if isinstance(reg.get("workshop"), dict) else {}
     workshop_appid = str(workshop.get("appId") or os.environ.get("WORKSHOP_APPID", "108600")).strip()
 
-    content_root = args.content_root
-    if content_root is None:
-        root = workshop.get("contentRoot")
-        content_root = Path(str(root)) if root else None
+    content_root = workshop_content_root(reg, args.content_root)
 
     reg.setdefault("resolution", {})
+    prev_cleanup = copy.deepcopy(reg["resolution"].get("cleanup"))
     cleanup = reg["resolution"].setdefault("cleanup", {})
     cleanup.setdefault("warnings", [])
 
     if content_root is None:
-        msg = "No workshop content root available (neither --content-root nor registry.workshop.contentRoot)."
+        msg = "No workshop content root available (neither --content-root, WORKSHOP_CONTENT_ROOT nor registry.workshop.contentRoot)."
         if args.strict:
             err(msg)
             return 2
         warn(msg)
         cleanup["warnings"].append(msg)
-        reg["generatedAt"] = utc_now_iso()
-        save_json(registry_path, reg)
+        _save_registry(registry_path, reg, prev_cleanup)
         return 0
 
     if not content_root.exists():
@@ -264,18 +304,19 @@ def main(argv: Sequence[str] | None = None) -> int:
             return 2
         warn(msg)
         cleanup["warnings"].append(msg)
-        reg["generatedAt"] = utc_now_iso()
-        save_json(registry_path, reg)
+        _save_registry(registry_path, reg, prev_cleanup)
         return 0
 
+    cleanup["contentRoot"] = str(content_root)
+    entries = list_item_dirs(content_root)
     pruned_ids: List[str] = []
     kept_ids: List[str] = []
     if args.prune_cache:
         pruned_ids, kept_ids = prune_workshop_dirs(
-            content_root=content_root, keep_ids=keep_ids, dry_run=args.dry_run
+            entries=entries, keep_ids=keep_ids, dry_run=args.dry_run
         )
     else:
-        kept_ids = [p.name for p in list_item_dirs(content_root)]
+        kept_ids = [e.name for e in entries]
         log("prune: cache pruning disabled")
 
     cleanup["prunedWorkshopItemIds"] = pruned_ids
@@ -311,14 +352,16 @@ def main(argv: Sequence[str] | None = None) -> int:
 
     missing: List[str] = []
     if args.verify:
-        missing = verify_workshop_dirs(content_root, desired_ids)
+        present = {e.name for e in entries if e.is_dir}
+        if not args.dry_run:
+            present.difference_update(pruned_ids)
+        missing = verify_workshop_dirs(present, desired_ids)
         cleanup["missingWorkshopItemIds"] = missing
         if missing:
             msg = f"verify: missing {len(missing)} enabled workshop item(s) on disk"
             err(msg + ": " + ", ".join(missing))
 
-    reg["generatedAt"] = utc_now_iso()
-    save_json(registry_path, reg)
+    _save_registry(registry_path, reg, prev_cleanup, durable=True)
 
     return 1 if missing else 0
 
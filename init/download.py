@@ -9,14 +9,17 @@ Writes install bookkeeping to a separate `*.last_run.json` file.
 from __future__ import annotations
 
 import argparse
-import json
 import os
+import re
 import subprocess
 import sys
-from datetime import datetime, timezone
+import threading
+import time
 from pathlib import Path
 from typing import Any, Dict, List, Sequence, Set
 
+from _registry import as_bool_env, enabled_workshop_ids, load_json, save_json, workshop_content_root
+
 
 def log(msg: str) -> None:
     print(msg)
@@ -31,19 +34,9 @@ def err(msg: str) -> None:
 
 
 def utc_now_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-
-def load_json(path: Path) -> Dict[str, Any]:
-    return json.loads(path.read_text(encoding="utf-8"))
-
-
-def save_json(path: Path, data: Dict[str, Any]) -> None:
-    tmp = path.with_suffix(path.suffix + ".tmp")
-    with tmp.open("w", encoding="utf-8") as fh:
-        json.dump(data, fh, indent=2, sort_keys=False)
-        fh.write("\n")
-    tmp.replace(path)
+    t = time.time()
+    base = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(t))
+    return f"{base}.{int((t % 1) * 1e6):06d}+00:00"
 
 
 def default_registry_path() -> Path:
@@ -75,6 +68,7 @@ def normalize_last_run_state(raw: Dict[str, Any] | None = None) -> Dict[str, Any
     state.setdefault("installFailedWorkshopIds", [])
     state.setdefault("enabledWorkshopIds", [])
     state.setdefault("enabledModIdsOrdered", [])
+    state.setdefault("validatedMods", {})
     return state
 
 
@@ -91,42 +85,39 @@ def save_last_run_state(path: Path, state: Dict[str, Any]) -> None:
     save_json(path, normalize_last_run_state(state))
 
 
-def unique_preserve_order(items: Sequence[str]) -> List[str]:
-    seen: Set[str] = set()
-    out: List[str] = []
-    for x in items:
-        s = str(x).strip()
-        if not s or s in seen:
-            continue
-        seen.add(s)
-        out.append(s)
-    return out
-
-
-def enabled_workshop_ids_from_registry(reg: Dict[str, Any]) -> List[str]:
-    mods_root = reg.get("mods")
-    if not isinstance(mods_root, list):
-        return []
-
-    out: List[str] = []
-    for item in mods_root:
-        if not isinstance(item, dict):
-            continue
-        wid = str(item.get("workshopId", "")).strip()
-        enabled_mod_ids = [
-            str(m.get("id", "")).strip()
-            for m in (item.get("mods") or [])
-            if isinstance(m, dict)
-            and bool(m.get("enabled", False))
-            and str(m.get("id", "")).strip()
-        ]
-        if wid and enabled_mod_ids:
-            out.append(wid)
-    return unique_preserve_order(out)
+def existing_item_dirs(content_root: Path) -> Set[str]:
+    """Names of workshop item dirs under content_root, from a single scandir."""
+    try:
+        with os.scandir(content_root) as it:
+            return {e.name for e in it if e.is_dir()}
+    except (FileNotFoundError, NotADirectoryError):
+        return set()
+
+
+def validation_is_fresh(
+    entry: Any, item_dir: Path, *, now: float, ttl_seconds: int
+) -> bool:
+    """
+    True when a `validatedMods` entry still matches item_dir's mtime and is within the TTL.
+    """
+    if not isinstance(entry, dict):
+        return False
+    try:
+        mtime_ns = os.stat(item_dir).st_mtime_ns
+    except OSError:
+        return False
+    try:
+        validated_at = float(entry.get("validatedAt") or 0)
+    except (TypeError, ValueError):
+        return False
+    return entry.get("mtimeNs") == mtime_ns and now - validated_at < ttl_seconds
 
 
-def is_downloaded(content_root: Path, wid: str) -> bool:
-    return (content_root / str(wid)).is_dir()
+# steamcmd's per-item verdicts inside a multi-item session. steamcmd prints
+# "Downloading item <id> ..." without a newline, so a verdict often shares the
+# line with it and is searched for anywhere in the line.
+_RE_ITEM_OK = re.compile(r"Success\. Downloaded item (\d+)")
+_RE_ITEM_FAILED = re.compile(r"ERROR! (?:Download item|Timeout downloading item) (\d+)")
 
 
 def steamcmd_download(
@@ -135,37 +126,77 @@ def steamcmd_download(
     steamappdir: Path,
     workshop_appid: str,
     steam_login: str,
-    workshop_id: str,
+    workshop_ids: Sequence[str],
     timeout_seconds: int,
-) -> int:
-    cmd = [
-        steamcmd_bin,
-        "+force_install_dir",
-        str(steamappdir),
-        "+login",
-        steam_login,
-        "+workshop_download_item",
-        str(workshop_appid),
-        str(workshop_id),
-        "validate",
-        "+quit",
-    ]
-    log(f"steamcmd: downloading workshop item {workshop_id} (app {workshop_appid})")
+) -> Dict[str, int]:
+    """
+    Download all workshop_ids in one steamcmd session (one login), returning an
+    exit code per item.
+
+    steamcmd's own exit code covers the whole session, so its per-item
+    "Success. Downloaded item" / "ERROR! Download item" lines take precedence;
+    an item with neither inherits the session's code. timeout_seconds is per
+    item and scales with the batch.
+    """
+    cmd = [steamcmd_bin, "+force_install_dir", str(steamappdir), "+login", steam_login]
+    for wid in workshop_ids:
+        cmd += ["+workshop_download_item", str(workshop_appid), str(wid), "validate"]
+    cmd.append("+quit")
+
+    log(f"steamcmd: downloading {len(workshop_ids)} workshop item(s) (app {workshop_appid})")
+    ok: Set[str] = set()
+    failed: Set[str] = set()
     try:
-        proc = subprocess.run(
+        proc = subprocess.Popen(
             cmd,
-            stdout=sys.stdout,
+            stdout=subprocess.PIPE,
             stderr=sys.stderr,
-            check=False,
-            timeout=timeout_seconds,
+            text=True,
+            errors="replace",
         )
-        return int(proc.returncode)
-    except subprocess.TimeoutExpired:
-        warn(f"steamcmd: timed out downloading {workshop_id} after {timeout_seconds}s")
-        return 124
     except FileNotFoundError:
         err(f"steamcmd binary not found: {steamcmd_bin}")
-        return 127
+        return {wid: 127 for wid in workshop_ids}
+
+    timeout_total = timeout_seconds * max(1, len(workshop_ids))
+    timed_out = threading.Event()
+
+    def _kill() -> None:
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout_total, _kill)
+    timer.start()
+    try:
+        assert proc.stdout is not None
+        # Tee the session output so progress still shows up live.
+        for line in proc.stdout:
+            sys.stdout.write(line)
+            m = _RE_ITEM_OK.search(line)
+            if m:
+                ok.add(m.group(1))
+                continue
+            m = _RE_ITEM_FAILED.search(line)
+            if m:
+                failed.add(m.group(1))
+        rc = proc.wait()
+    finally:
+        timer.cancel()
+    sys.stdout.flush()
+
+    if timed_out.is_set():
+        warn(f"steamcmd: timed out after {timeout_total}s")
+        rc = 124
+    session_rc = int(rc)
+    out: Dict[str, int] = {}
+    for wid in workshop_ids:
+        if wid in ok:
+            out[wid] = 0
+        elif wid in failed:
+            out[wid] = session_rc or 1
+        else:
+            out[wid] = session_rc
+    return out
 
 
 def main(argv: Sequence[str] | None = None) -> int:
@@ -187,6 +218,18 @@ def main(argv: Sequence[str] | None = None) -> int:
         default=int(os.environ.get("STEAMCMD_TIMEOUT_SECONDS", "1800")),
         help="Per-item steamcmd timeout seconds.",
     )
+    ap.add_argument(
+        "--revalidate",
+        action="store_true",
+        default=as_bool_env("STEAMCMD_REVALIDATE", False),
+        help="Re-run steamcmd validate for items already on disk (env: STEAMCMD_REVALIDATE).",
+    )
+    ap.add_argument(
+        "--validate-ttl-seconds",
+        type=int,
+        default=int(os.environ.get("VALIDATE_TTL_SECONDS", "86400")),
+        help="With --revalidate, skip items validated within this window whose dir mtime is unchanged.",
+    )
     ap.add_argument(
         "--last-run-file",
         type=Path,
@@ -217,13 +260,11 @@ def main(argv: Sequence[str] | None = None) -> int:
 
     reg = load_json(registry_path)
     lr = load_last_run_state(args.last_run_file)
-    to_install = enabled_workshop_ids_from_registry(reg)
+    to_install = enabled_workshop_ids(reg)
 
     lr["installPlannedWorkshopIds"] = list(to_install)
 
-    workshop = reg.setdefault("workshop", {})
-    content_root = workshop.get("contentRoot")
-    content_root_path = Path(content_root) if content_root else None
+    content_root_path = workshop_content_root(reg)
 
     if not to_install:
         log("install: no enabled workshop IDs to install")
@@ -240,32 +281,62 @@ def main(argv: Sequence[str] | None = None) -> int:
             log(f"  - {wid}")
         return 0
 
-    installed: List[str] = []
-    failed: List[str] = []
+    existing = existing_item_dirs(content_root_path) if content_root_path is not None else set()
+    validated = lr["validatedMods"] if isinstance(lr["validatedMods"], dict) else {}
+    lr["validatedMods"] = validated
+    now = time.time()
 
+    present: Set[str] = set()
+    pending: List[str] = []
     for wid in to_install:
-        if content_root_path is not None and is_downloaded(content_root_path, wid):
-            log(f"install: already present on disk: {wid}")
-            installed.append(wid)
-            continue
-
-        rc = steamcmd_download(
+        if wid in existing:
+            if not args.revalidate:
+                log(f"install: already present on disk: {wid}")
+                present.add(wid)
+                continue
+            if validation_is_fresh(
+                validated.get(wid),
+                content_root_path / wid,
+                now=now,
+                ttl_seconds=int(args.validate_ttl_seconds),
+            ):
+                log(f"install: validated recently and unchanged: {wid}")
+                present.add(wid)
+                continue
+        pending.append(wid)
+
+    # One steamcmd session for every pending item: the login/handshake is paid
+    # once and all downloads share the single force_install_dir.
+    rc_by_wid: Dict[str, int] = {}
+    if pending:
+        rc_by_wid = steamcmd_download(
             steamcmd_bin=steamcmd_bin,
             steamappdir=steamappdir,
             workshop_appid=workshop_appid,
             steam_login=steam_login,
-            workshop_id=wid,
+            workshop_ids=pending,
             timeout_seconds=int(args.timeout_seconds),
         )
-        if rc == 0:
-            installed.append(wid)
-        else:
-            failed.append(wid)
+
+    installed: List[str] = [
+        wid for wid in to_install if wid in present or rc_by_wid.get(wid) == 0
+    ]
+    failed: List[str] = [wid for wid in pending if rc_by_wid[wid] != 0]
+
+    if content_root_path is not None:
+        for wid in pending:
+            if rc_by_wid[wid] != 0:
+                continue
+            try:
+                mtime_ns = os.stat(content_root_path / wid).st_mtime_ns
+            except OSError:
+                continue
+            validated[wid] = {"mtimeNs": mtime_ns, "validatedAt": time.time()}
 
     lr["installCompletedWorkshopIds"] = installed
     lr["installFailedWorkshopIds"] = failed
     reg["generatedAt"] = utc_now_iso()
-    save_json(registry_path, reg)
+    save_json(registry_path, reg, durable=True)
     save_last_run_state(args.last_run_file, lr)
 
     if failed:
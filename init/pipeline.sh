@@ -152,6 +152,7 @@ else
   export STEAMCMD_BIN
   export STEAM_LOGIN
   export STEAMCMD_TIMEOUT_SECONDS
+  export WORKSHOP_CONTENT_ROOT
   python3 -u "${DL_PY}" --registry "${MOD_CATALOG}" --last-run-file "${LAST_RUN_FILE}"
 fi
 
@@ -166,6 +167,7 @@ else
 
   export STEAMAPPDIR
   export WORKSHOP_APPID
+  export WORKSHOP_CONTENT_ROOT
   # By default, cleanup.py prunes cache + manifest (best-effort) and verifies.
   python3 -u "${CLEAN_PY}" --registry "${MOD_CATALOG}"
 fi
@@ -57,6 +57,17 @@ import sys
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Sequence
 
+from _registry import enabled_workshop_ids, load_json, ordered_mod_ids
+
+# One of the rewritten keys plus its continuation lines: non-blank lines that
+# are neither comments nor a new `Key=` line.
+# Matched on raw bytes so the INI never goes through a decode/encode round-trip.
+_RE_KEY_BLOCK = re.compile(
+    rb"^(Mods|WorkshopItems|Map)[^\S\r\n]*=[^\r\n]*(?:\r?\n|\Z)"
+    rb"(?:(?![A-Za-z][A-Za-z0-9_]*[^\S\r\n]*=|#)[^\r\n]+(?:\r?\n|\Z))*",
+    re.IGNORECASE | re.MULTILINE,
+)
+
 
 def _fatal(msg: str) -> "None":
     print(f"ERROR: {msg}", file=sys.stderr)
@@ -65,7 +76,7 @@ def _fatal(msg: str) -> "None":
 
 def _load_json(path: Path) -> Dict[str, Any]:
     try:
-        return json.loads(path.read_text(encoding="utf-8"))
+        return load_json(path)
     except FileNotFoundError:
         _fatal(f"registry file not found: {path}")
         raise  # for type-checkers; unreachable
@@ -75,15 +86,7 @@ def _load_json(path: Path) -> Dict[str, Any]:
 
 
 def _unique_preserve_order(items: Iterable[Any]) -> List[str]:
-    seen = set()
-    out: List[str] = []
-    for x in items:
-        s = str(x).strip()
-        if not s or s in seen:
-            continue
-        seen.add(s)
-        out.append(s)
-    return out
+    return list(dict.fromkeys(s for s in (str(x).strip() for x in items) if s))
 
 
 def _get_nested(plan: Dict[str, Any], path: Sequence[str]) -> Optional[Any]:
@@ -98,43 +101,11 @@ def _get_nested(plan: Dict[str, Any], path: Sequence[str]) -> Optional[Any]:
 
 
 def extract_enabled_workshop_ids(plan: Dict[str, Any]) -> List[str]:
-    mods_root = plan.get("mods")
-    if not isinstance(mods_root, list):
-        return []
-    out: List[str] = []
-    for item in mods_root:
-        if not isinstance(item, dict):
-            continue
-        wid = str(item.get("workshopId", "")).strip()
-        enabled_mod_ids = [
-            str(m.get("id", "")).strip()
-            for m in (item.get("mods") or [])
-            if isinstance(m, dict)
-            and bool(m.get("enabled", False))
-            and str(m.get("id", "")).strip()
-        ]
-        if wid and enabled_mod_ids and re.fullmatch(r"\d+", wid):
-            out.append(wid)
-    return _unique_preserve_order(out)
+    return enabled_workshop_ids(plan, numeric_only=True)
 
 
 def extract_ordered_mod_ids(plan: Dict[str, Any]) -> List[str]:
-    mods_root = plan.get("mods")
-    if not isinstance(mods_root, list):
-        return []
-    out: List[str] = []
-    seen: set[str] = set()
-    for item in mods_root:
-        if not isinstance(item, dict):
-            continue
-        for meta in (item.get("mods") or []):
-            if not isinstance(meta, dict) or not bool(meta.get("enabled", False)):
-                continue
-            s = str(meta.get("id", "")).strip()
-            if s and s not in seen:
-                out.append(s)
-                seen.add(s)
-    return out
+    return ordered_mod_ids(plan)
 
 
 def extract_ordered_map_names(plan: Dict[str, Any]) -> List[str]:
@@ -165,18 +136,6 @@ def extract_ordered_map_names(plan: Dict[str, Any]) -> List[str]:
     return []
 
 
-def _is_continuation_line(s: str) -> bool:
-    """
-    A continuation line does not look like a new INI key, or blank/comment.
-    """
-    s = s.rstrip("\r\n")
-    return (
-        bool(s)
-        and not s.startswith("#")
-        and not re.match(r"[A-Za-z][A-Za-z0-9_]*\s*=", s)
-    )
-
-
 def rewrite_ini_keys(
     ini_path: Path,
     *,
@@ -186,57 +145,41 @@ def rewrite_ini_keys(
 ) -> None:
     """
     Rewrite the Mods=, WorkshopItems=, and Map= entries in ini_path, preserving
-    everything else. Handles multi-line INI values by skipping continuation
+    everything else. Handles multi-line INI values by dropping continuation
     lines for the keys being rewritten.
+
+    The whole file is rewritten in a single `re.sub` pass over the text.
     """
-    original = ini_path.read_text(encoding="utf-8", errors="replace")
+    original = ini_path.read_bytes()
     # Strip NUL bytes occasionally present in PZ saves
-    if "\x00" in original:
-        original = original.replace("\x00", "")
-
-    out_lines: List[str] = []
-    wrote_mods = False
-    wrote_workshop = False
-    wrote_map = False
-
-    skipping = False
-    for raw in original.splitlines(keepends=True):
-        stripped = raw.rstrip("\r\n")
-
-        if skipping:
-            if _is_continuation_line(stripped):
-                continue
-            skipping = False
-
-        if re.match(r"(?i)^Mods\s*=", stripped):
-            out_lines.append(f"Mods={mods_csv}\n")
-            wrote_mods = True
-            skipping = True
-            continue
-
-        if re.match(r"(?i)^WorkshopItems\s*=", stripped):
-            out_lines.append(f"WorkshopItems={workshop_csv}\n")
-            wrote_workshop = True
-            skipping = True
-            continue
-
-        if map_csv is not None and re.match(r"(?i)^Map\s*=", stripped):
-            out_lines.append(f"Map={map_csv}\n")
-            wrote_map = True
-            skipping = True
-            continue
-
-        out_lines.append(raw)
+    if b"\x00" in original:
+        original = original.replace(b"\x00", b"")
+    # Normalize line endings to LF, as text-mode reads always did
+    if b"\r" in original:
+        original = original.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+
+    values = {
+        b"mods": ("Mods", mods_csv),
+        b"workshopitems": ("WorkshopItems", workshop_csv),
+        b"map": ("Map", map_csv),
+    }
+    wrote: set[str] = set()
+
+    def _replace(m: "re.Match[bytes]") -> bytes:
+        key, value = values[m.group(1).lower()]
+        if value is None:
+            return m.group(0)
+        wrote.add(key)
+        return f"{key}={value}\n".encode("utf-8")
+
+    text = _RE_KEY_BLOCK.sub(_replace, original)
 
     # Append missing keys
-    if not wrote_mods:
-        out_lines.append(f"Mods={mods_csv}\n")
-    if not wrote_workshop:
-        out_lines.append(f"WorkshopItems={workshop_csv}\n")
-    if map_csv is not None and not wrote_map:
-        out_lines.append(f"Map={map_csv}\n")
-
-    ini_path.write_text("".join(out_lines), encoding="utf-8")
+    for key, value in values.values():
+        if value is not None and key not in wrote:
+            text += f"{key}={value}\n".encode("utf-8")
+
+    ini_path.write_bytes(text)
 
 
 def mod_ids_to_pz_mods_csv(mod_ids: Sequence[str]) -> str:
@@ -59,15 +59,28 @@ Exit codes
 from __future__ import annotations
 
 import argparse
-import json
+import io
+import os
 import re
+import stat
 import sys
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple, Union
+
+from _registry import load_json
+
+
+class _WorkerFatal(Exception):
+    """_fatal() raised on a scan worker thread; scan_maps re-raises it on the main thread."""
 
 
 def _fatal(msg: str) -> "None":
+    if threading.current_thread() is not threading.main_thread():
+        raise _WorkerFatal(msg)
     print(f"ERROR: {msg}", file=sys.stderr)
     raise SystemExit(2)
 
@@ -78,15 +91,53 @@ def _warn(msg: str) -> None:
 
 def _load_json(path: Path) -> Dict[str, Any]:
     try:
-        return json.loads(path.read_text(encoding="utf-8"))
+        return load_json(path)
     except FileNotFoundError:
         _fatal(f"registry file not found: {path}")
         raise
-    except json.JSONDecodeError as e:
+    except ValueError as e:  # json/orjson.JSONDecodeError, or non-UTF-8 bytes
         _fatal(f"invalid JSON in registry {path}: {e}")
         raise
 
 
+try:
+    _IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = 1024
+
+
+def _write_all(fd: int, buf: bytes) -> None:
+    view = memoryview(buf)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+def _write_chunks(path: Path, chunks: Sequence[bytes]) -> None:
+    """
+    Write pre-encoded chunks without joining them first.
+
+    Uses os.writev (one syscall per IOV_MAX buffers) where available, with a
+    plain os.write loop as the fallback and for short writes.
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        if not hasattr(os, "writev"):
+            for chunk in chunks:
+                _write_all(fd, chunk)
+            return
+        for i in range(0, len(chunks), _IOV_MAX):
+            batch = chunks[i : i + _IOV_MAX]
+            written = os.writev(fd, batch)
+            for chunk in batch:
+                if written >= len(chunk):
+                    written -= len(chunk)
+                    continue
+                _write_all(fd, chunk[written:])
+                written = 0
+    finally:
+        os.close(fd)
+
+
 def _get_nested(plan: Dict[str, Any], path: Sequence[str]) -> Optional[Any]:
     cur: Any = plan
     for p in path:
@@ -99,38 +150,41 @@ def _get_nested(plan: Dict[str, Any], path: Sequence[str]) -> Optional[Any]:
 
 
 def _unique_preserve_order(items: Iterable[str]) -> List[str]:
-    seen = set()
-    out: List[str] = []
-    for x in items:
-        s = str(x).strip()
-        if not s or s in seen:
-            continue
-        seen.add(s)
-        out.append(s)
-    return out
+    return list(dict.fromkeys(s for s in (str(x).strip() for x in items) if s))
 
 
-def extract_enabled_workshop_ids(plan: Dict[str, Any]) -> List[str]:
+def _extract_enabled(plan: Dict[str, Any]) -> Tuple[List[str], Set[str]]:
+    """
+    Single pass over `plan["mods"]`.
+
+    Returns (numeric workshop IDs with at least one enabled mod, in registry order,
+    de-duplicated; the set of all enabled mod IDs).
+    """
     mods_root = plan.get("mods")
     if not isinstance(mods_root, list):
-        return []
-    out: List[str] = []
+        return [], set()
+    workshop_ids: Dict[str, None] = {}
+    mod_ids: Set[str] = set()
     for item in mods_root:
         if not isinstance(item, dict):
             continue
+        has_enabled = False
+        for meta in (item.get("mods") or []):
+            if not isinstance(meta, dict) or not bool(meta.get("enabled", False)):
+                continue
+            s = str(meta.get("id", "")).strip()
+            if s:
+                mod_ids.add(s)
+                has_enabled = True
         wid = str(item.get("workshopId", "")).strip()
-        enabled_mod_ids = [
-            str(m.get("id", "")).strip()
-            for m in (item.get("mods") or [])
-            if isinstance(m, dict)
-            and bool(m.get("enabled", False))
-            and str(m.get("id", "")).strip()
-        ]
-        if wid and enabled_mod_ids and re.fullmatch(r"\d+", wid):
-            out.append(wid)
-    return _unique_preserve_order(out)
+        if has_enabled and wid.isdecimal():
+            workshop_ids[wid] = None
+    return list(workshop_ids), mod_ids
 
 
+_MAP_KEY_RE = re.compile(r"Map\s*=", re.IGNORECASE)
+_INI_KEY_RE = re.compile(r"[A-Za-z][A-Za-z0-9_]*\s*=")
+
 
 def _is_continuation_line(s: str) -> bool:
     """
@@ -141,20 +195,27 @@ def _is_continuation_line(s: str) -> bool:
     return (
         bool(s)
         and not s.startswith("#")
-        and not re.match(r"[A-Za-z][A-Za-z0-9_]*\s*=", s)
+        and not _INI_KEY_RE.match(s)
     )
 
 
-def rewrite_ini_map_key(ini_path: Path, *, map_csv: str) -> None:
+def rewrite_ini_map_key(ini_path: Path, *, map_names: Sequence[str]) -> None:
     original = ini_path.read_text(encoding="utf-8", errors="replace")
     if "\x00" in original:
         original = original.replace("\x00", "")
 
-    out_lines: List[str] = []
+    # `Map=` + `;`-separated names + newline, as separate buffers for writev.
+    map_line: List[bytes] = [b"Map="]
+    for i, name in enumerate(map_names):
+        if i:
+            map_line.append(b";")
+        map_line.append(name.encode("utf-8"))
+    map_line.append(b"\n")
+    out_chunks: List[bytes] = []
     wrote_map = False
 
     skipping = False
-    for raw in original.splitlines(keepends=True):
+    for raw in io.StringIO(original):
         stripped = raw.rstrip("\r\n")
 
         if skipping:
@@ -162,18 +223,19 @@ def rewrite_ini_map_key(ini_path: Path, *, map_csv: str) -> None:
                 continue
             skipping = False
 
-        if re.match(r"(?i)^Map\s*=", stripped):
-            out_lines.append(f"Map={map_csv}\n")
+        head = stripped[:4].lower()
+        if head == "map=" or (head[:3] == "map" and _MAP_KEY_RE.match(stripped)):
+            out_chunks.extend(map_line)
             wrote_map = True
             skipping = True
             continue
 
-        out_lines.append(raw)
+        out_chunks.append(raw.encode("utf-8"))
 
     if not wrote_map:
-        out_lines.append(f"Map={map_csv}\n")
+        out_chunks.extend(map_line)
 
-    ini_path.write_text("".join(out_lines), encoding="utf-8")
+    _write_chunks(ini_path, out_chunks)
 
 
 def _safe_rel(p: Path, root: Path) -> str:
@@ -183,7 +245,7 @@ def _safe_rel(p: Path, root: Path) -> str:
         return str(p)
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class MapSource:
     workshop_id: str
     map_name: str
@@ -191,8 +253,7 @@ class MapSource:
     mod_id: Optional[str] = None
 
 
-@dataclass(frozen=True)
-class MapCellClaim:
+class MapCellClaim(NamedTuple):
     map_name: str
     workshop_id: str
     cell_x: int
@@ -200,28 +261,69 @@ class MapCellClaim:
     source_file: Path
 
 
-def _is_map_dir(map_dir: Path) -> bool:
+def _is_map_dir(map_dir: Union[Path, "os.DirEntry[str]"]) -> bool:
     """
     Decide whether a directory looks like a Project Zomboid map folder.
 
     Prefer `map.info` but allow `.lotheader`-only packages as a fallback.
+    Accepts a Path or an `os.DirEntry` from a scandir walk.
     """
-    if not map_dir.exists() or not map_dir.is_dir():
+    path = os.fspath(map_dir)
+    if not (map_dir.is_dir() if isinstance(map_dir, os.DirEntry) else os.path.isdir(path)):
         return False
-    if (map_dir / "map.info").exists():
+    if os.path.lexists(os.path.join(path, "map.info")):
         return True
     # Fallback: if it contains at least one .lotheader file, treat as a map dir.
     try:
-        for p in map_dir.iterdir():
-            if p.is_symlink():
-                continue
-            if p.is_file() and p.suffix.lower() == ".lotheader":
-                return True
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name[-10:].lower() != ".lotheader" or entry.is_symlink():
+                    continue
+                if entry.is_file(follow_symlinks=False):
+                    return True
     except PermissionError as e:
-        _fatal(f"permission error scanning map dir {map_dir}: {e}")
+        _fatal(f"permission error scanning map dir {path}: {e}")
     return False
 
 
+# Directory names that never lead to a `media/maps` folder.
+_SKIP_WALK_DIRS = frozenset({".git", ".svn", "__pycache__", "node_modules"})
+
+
+def _scandir_rec(item_root: Path) -> Iterator[str]:
+    """
+    Yield every real `.../media/maps` directory under item_root.
+
+    Walks with `os.scandir`, pre-order like `Path.rglob`, and never descends into
+    or yields symlinked directories (duplicate-case compatibility links).
+    A `media` dir only matters through its `maps` child and `maps` children are
+    listed by the caller, so the walk never enters `media` itself; that skips
+    the texture/lua/sound trees that make up most of a mod.
+    """
+    stack = [os.fspath(item_root)]
+    while stack:
+        cur = stack.pop()
+        try:
+            with os.scandir(cur) as it:
+                subdirs = [e for e in it if e.is_dir(follow_symlinks=False)]
+        except (FileNotFoundError, NotADirectoryError, PermissionError):
+            continue
+
+        if any(e.name == "media" for e in subdirs):
+            maps_parent = os.path.join(cur, "media", "maps")
+            try:
+                if stat.S_ISDIR(os.lstat(maps_parent).st_mode):
+                    yield maps_parent
+            except OSError:
+                pass
+
+        stack.extend(
+            e.path
+            for e in reversed(subdirs)
+            if e.name != "media" and e.name not in _SKIP_WALK_DIRS
+        )
+
+
 def _discover_map_dirs_recursive(item_root: Path) -> List[Path]:
     """
     Recursively discover map directories under a workshop item root.
@@ -236,36 +338,28 @@ def _discover_map_dirs_recursive(item_root: Path) -> List[Path]:
     and then validate the leaf directory as an actual map dir.
     """
     out: List[Path] = []
-    seen: set[str] = set()
-
-    # Find any directory named "maps" that lives under a "media" parent, then check its children.
-    for media_dir in item_root.rglob("media"):
-        # Ignore symlinked directories to prevent duplicate-case compatibility links.
-        if media_dir.is_symlink():
-            continue
-        if not media_dir.is_dir():
-            continue
-
-        maps_parent = media_dir / "maps"
-        if not maps_parent.exists() or not maps_parent.is_dir():
-            continue
-        if maps_parent.is_symlink():
-            continue
+    seen: set[Union[Tuple[int, int], str]] = set()
 
+    for maps_parent in _scandir_rec(item_root):
         try:
-            for child in sorted(maps_parent.iterdir(), key=lambda p: p.name.lower()):
-                if child.is_symlink():
-                    continue
-                if not child.is_dir():
-                    continue
-                # De-dupe by realpath string to avoid double-counting the same directory reached twice.
-                key = str(child.resolve())
+            with os.scandir(maps_parent) as it:
+                children = [e for e in it if e.is_dir(follow_symlinks=False)]
+            children.sort(key=lambda e: e.name.lower())
+
+            for child in children:
+                # De-dupe by inode to avoid double-counting the same directory reached twice.
+                key: Union[Tuple[int, int], str]
+                try:
+                    st = child.stat(follow_symlinks=False)
+                    key = (st.st_dev, st.st_ino)
+                except OSError:
+                    key = child.path
                 if key in seen:
                     continue
                 seen.add(key)
 
                 if _is_map_dir(child):
-                    out.append(child)
+                    out.append(Path(child.path))
         except PermissionError as e:
             _fatal(f"permission error scanning {maps_parent}: {e}")
 
@@ -275,7 +369,23 @@ def _discover_map_dirs_recursive(item_root: Path) -> List[Path]:
 _MODINFO_ID_RE = re.compile(r"(?i)^id\s*=\s*(.+)$")
 
 
+# Parsed mod.info IDs keyed by file identity plus (mtime, size), so a mod.info
+# rewritten in place is parsed again rather than served from the cache.
+_MOD_INFO_CACHE: Dict[Tuple[int, int, int, int], Optional[str]] = {}
+
+
 def _parse_mod_id_from_mod_info(mod_info_path: Path) -> Optional[str]:
+    try:
+        st = os.stat(mod_info_path)
+    except FileNotFoundError:
+        return None
+    except PermissionError as e:
+        _fatal(f"permission error reading {mod_info_path}: {e}")
+    key = (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+    if key in _MOD_INFO_CACHE:
+        return _MOD_INFO_CACHE[key]
+
+    mod_id: Optional[str] = None
     try:
         with mod_info_path.open("r", encoding="utf-8", errors="replace") as fh:
             for raw_line in fh:
@@ -283,17 +393,52 @@ def _parse_mod_id_from_mod_info(mod_info_path: Path) -> Optional[str]:
                 m = _MODINFO_ID_RE.match(line)
                 if not m:
                     continue
-                mod_id = m.group(1).strip().lstrip("\\").strip()
+                mod_id = m.group(1).strip().lstrip("\\").strip() or None
                 if mod_id:
-                    return mod_id
+                    break
     except FileNotFoundError:
         return None
     except PermissionError as e:
         _fatal(f"permission error reading {mod_info_path}: {e}")
+    _MOD_INFO_CACHE[key] = mod_id
+    return mod_id
+
+
+def _mod_id_in_dir(cur: Path) -> Optional[str]:
+    candidates = [
+        cur / "mod.info",
+        cur / "42.0" / "mod.info",
+        cur / "common" / "42.0" / "mod.info",
+    ]
+    for candidate in candidates:
+        # One lstat covers exists/is_file/not-a-symlink: symlinks are not S_ISREG.
+        try:
+            st = os.lstat(candidate)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        if not stat.S_ISREG(st.st_mode):
+            continue
+        mod_id = _parse_mod_id_from_mod_info(candidate)
+        if mod_id:
+            return mod_id
     return None
 
 
-def _find_owner_mod_id_for_map_dir(map_dir: Path, item_root: Path) -> Optional[str]:
+def _is_walk_end(cur: Path, item_root: Path, item_resolved: Path) -> bool:
+    if cur == cur.parent:
+        return True
+    try:
+        return cur.resolve() == item_resolved
+    except Exception:
+        return cur == item_root
+
+
+def _find_owner_mod_id_for_map_dir(
+    map_dir: Path,
+    item_root: Path,
+    *,
+    owner_cache: Optional[Dict[Tuple[int, int], Optional[str]]] = None,
+) -> Optional[str]:
     """
     Best-effort owner Mod ID discovery for a map folder.
 
@@ -302,37 +447,42 @@ def _find_owner_mod_id_for_map_dir(map_dir: Path, item_root: Path) -> Optional[s
       - <mod-root>/mod.info
       - <mod-root>/42.0/mod.info
       - <mod-root>/common/42.0/mod.info
+
+    Everything above map_dir is shared by its sibling maps, so with an
+    owner_cache (one per scan) that part of the walk is cached by the parent
+    directory's inode.
     """
-    cur = map_dir
+    mod_id = _mod_id_in_dir(map_dir)
+    if mod_id:
+        return mod_id
+
     try:
         item_resolved = item_root.resolve()
     except Exception:
         item_resolved = item_root
+    if _is_walk_end(map_dir, item_root, item_resolved):
+        return None
 
-    while True:
-        candidates = [
-            cur / "mod.info",
-            cur / "42.0" / "mod.info",
-            cur / "common" / "42.0" / "mod.info",
-        ]
-        for candidate in candidates:
-            if not candidate.exists() or not candidate.is_file() or candidate.is_symlink():
-                continue
-            mod_id = _parse_mod_id_from_mod_info(candidate)
-            if mod_id:
-                return mod_id
+    cur = map_dir.parent
+    key: Optional[Tuple[int, int]] = None
+    if owner_cache is not None:
+        try:
+            st = os.stat(cur)
+            key = (st.st_dev, st.st_ino)
+        except OSError:
+            pass
+        if key is not None and key in owner_cache:
+            return owner_cache[key]
 
-        if cur == cur.parent:
+    while True:
+        mod_id = _mod_id_in_dir(cur)
+        if mod_id or _is_walk_end(cur, item_root, item_resolved):
             break
-        try:
-            if cur.resolve() == item_resolved:
-                break
-        except Exception:
-            if cur == item_root:
-                break
         cur = cur.parent
 
-    return None
+    if owner_cache is not None and key is not None:
+        owner_cache[key] = mod_id
+    return mod_id
 
 
 def discover_maps_for_workshop_item(
@@ -340,6 +490,7 @@ def discover_maps_for_workshop_item(
     *,
     workshop_id: str,
     enabled_mod_ids: Optional[Set[str]] = None,
+    owner_cache: Optional[Dict[Tuple[int, int], Optional[str]]] = None,
 ) -> List[MapSource]:
     """
     Discover map folders for a workshop item directory by scanning recursively for
@@ -353,7 +504,7 @@ def discover_maps_for_workshop_item(
         name = map_dir.name.strip()
         if not name:
             continue
-        owner_mod_id = _find_owner_mod_id_for_map_dir(map_dir, item_root)
+        owner_mod_id = _find_owner_mod_id_for_map_dir(map_dir, item_root, owner_cache=owner_cache)
         if enabled_mod_ids is not None and owner_mod_id and owner_mod_id not in enabled_mod_ids:
             continue
         out.append(
@@ -381,87 +532,94 @@ def scan_maps(
     if not base.exists():
         _fatal(f"workshop base directory not found: {base}")
 
-    all_sources: List[MapSource] = []
-    for wid in workshop_ids:
-        item_root = base / str(wid)
+    # Owner lookups shared by sibling maps, scoped to this scan so nothing
+    # outlives the directory state it was computed from.
+    owner_cache: Dict[Tuple[int, int], Optional[str]] = {}
+
+    def _scan_item(wid: str) -> List[MapSource]:
+        item_root = base / wid
         if not item_root.exists():
             _fatal(f"enabled workshop item not found on disk: {item_root}")
-        all_sources.extend(
-            discover_maps_for_workshop_item(
-                item_root,
-                workshop_id=str(wid),
-                enabled_mod_ids=enabled_mod_ids,
-            )
+        return discover_maps_for_workshop_item(
+            item_root,
+            workshop_id=wid,
+            enabled_mod_ids=enabled_mod_ids,
+            owner_cache=owner_cache,
         )
 
-    return all_sources
-
-
-def extract_enabled_mod_ids(plan: Dict[str, Any]) -> List[str]:
-    mods_root = plan.get("mods")
-    if not isinstance(mods_root, list):
-        return []
-    out: List[str] = []
-    seen: set[str] = set()
-    for item in mods_root:
-        if not isinstance(item, dict):
-            continue
-        for meta in (item.get("mods") or []):
-            if not isinstance(meta, dict) or not bool(meta.get("enabled", False)):
-                continue
-            s = str(meta.get("id", "")).strip()
-            if s and s not in seen:
-                out.append(s)
-                seen.add(s)
-    return out
+    # Each item is stat/small-read bound, so threads overlap the filesystem latency.
+    # Results are collected in workshop_ids order; the first failing item (in that
+    # order) is reported, exactly as the serial loop did.
+    all_sources: List[MapSource] = []
+    with ThreadPoolExecutor(max_workers=max(1, min(32, len(workshop_ids)))) as ex:
+        futures = [ex.submit(_scan_item, str(wid)) for wid in workshop_ids]
+        for fut in futures:
+            try:
+                all_sources.extend(fut.result())
+            except _WorkerFatal as e:
+                ex.shutdown(cancel_futures=True)
+                _fatal(str(e))
 
+    return all_sources
 
 
-_LOTHEADER_RE = re.compile(r"^(?P<x>-?\d+)_(?P<y>-?\d+)\.lotheader$", re.IGNORECASE)
+def _is_cell_coord(s: str) -> bool:
+    """True for `-?\\d+`; stricter than int(), which also accepts '+', spaces and '1_0'."""
+    return (s[1:] if s[:1] == "-" else s).isdecimal()
 
 
-def _iter_lotheaders(map_dir: Path) -> Iterable[Path]:
+def _iter_lotheaders(map_dir: Path) -> Iterator["os.DirEntry[str]"]:
     try:
-        for p in map_dir.iterdir():
-            # Ignore symlinked files to avoid double-counting compatibility links.
-            if p.is_symlink():
-                continue
-            if not p.is_file():
-                continue
-            if p.suffix.lower() != ".lotheader":
-                continue
-            yield p
+        with os.scandir(map_dir) as it:
+            for entry in it:
+                if entry.name[-10:].lower() != ".lotheader":
+                    continue
+                # Ignore symlinked files to avoid double-counting compatibility links.
+                if entry.is_symlink():
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                yield entry
     except FileNotFoundError:
         return
     except PermissionError as e:
         _fatal(f"permission error scanning map dir {map_dir}: {e}")
 
 
-def discover_cell_claims(map_sources: Sequence[MapSource]) -> List[MapCellClaim]:
+_CELL_MIN = -(1 << 31)
+_CELL_MAX = (1 << 31) - 1
+
+
+def discover_cell_claims_soa(
+    map_sources: Sequence[MapSource],
+) -> Tuple["array[int]", "array[int]", List[str]]:
     """
-    Build a list of world cell claims for each map by reading `X_Y.lotheader` filenames.
+    Collect world cell claims for each map from `X_Y.lotheader` filenames.
+
+    Returned as parallel arrays (one slot per claim) rather than objects:
+      - packed cell keys, `(x << 32) | (y & 0xFFFFFFFF)`
+      - index into map_sources of the claiming map
+      - the `.lotheader` path (only read when reporting conflicts)
     """
-    claims: List[MapCellClaim] = []
-    for src in map_sources:
+    cell_keys = array("q")
+    source_idx = array("i")
+    source_files: List[str] = []
+    for i, src in enumerate(map_sources):
         for lh in _iter_lotheaders(src.map_dir):
-            m = _LOTHEADER_RE.match(lh.name)
-            if not m:
+            # `_iter_lotheaders` already checked the extension; parse `X_Y` from the stem.
+            xs, sep, ys = lh.name[:-10].rpartition("_")
+            if not sep or not _is_cell_coord(xs) or not _is_cell_coord(ys):
                 continue
-            try:
-                cx = int(m.group("x"))
-                cy = int(m.group("y"))
-            except ValueError:
+            cx = int(xs)
+            cy = int(ys)
+            # Real cell coordinates are a few hundred at most; anything outside
+            # int32 cannot be packed and is not a world cell.
+            if not (_CELL_MIN <= cx <= _CELL_MAX and _CELL_MIN <= cy <= _CELL_MAX):
                 continue
-            claims.append(
-                MapCellClaim(
-                    map_name=src.map_name,
-                    workshop_id=src.workshop_id,
-                    cell_x=cx,
-                    cell_y=cy,
-                    source_file=lh,
-                )
-            )
-    return claims
+            cell_keys.append((cx << 32) | (cy & 0xFFFFFFFF))
+            source_idx.append(i)
+            source_files.append(lh.path)
+    return cell_keys, source_idx, source_files
 
 
 def detect_conflicts(map_sources: Sequence[MapSource]) -> None:
@@ -471,18 +629,38 @@ def detect_conflicts(map_sources: Sequence[MapSource]) -> None:
     We treat a conflict as: two distinct maps claim the same (cell_x, cell_y)
     based on `.lotheader` coverage.
     """
-    claims = discover_cell_claims(map_sources)
+    cell_keys, source_idx, source_files = discover_cell_claims_soa(map_sources)
 
-    by_cell: Dict[Tuple[int, int], List[MapCellClaim]] = {}
-    for c in claims:
-        by_cell.setdefault((c.cell_x, c.cell_y), []).append(c)
+    # Almost every cell has a single claim, so a list of claim indices is only
+    # allocated once a second claim for the same cell shows up.
+    first: Dict[int, int] = {}
+    shared: Dict[int, List[int]] = {}
+    for i, key in enumerate(cell_keys):
+        j = first.setdefault(key, i)
+        if j != i:
+            shared.setdefault(key, [j]).append(i)
 
     overlaps: List[Tuple[Tuple[int, int], List[MapCellClaim]]] = []
-    for cell, cs in by_cell.items():
+    for key, idxs in shared.items():
         # Different maps (or different workshop sources) claiming the same cell
-        unique_maps = {(x.map_name, x.workshop_id) for x in cs}
-        if len(unique_maps) > 1:
-            overlaps.append((cell, cs))
+        srcs = [map_sources[source_idx[k]] for k in idxs]
+        if len({(x.map_name, x.workshop_id) for x in srcs}) < 2:
+            continue
+        cx = key >> 32
+        cy = key & 0xFFFFFFFF
+        if cy > _CELL_MAX:
+            cy -= 1 << 32
+        cs = [
+            MapCellClaim(
+                map_name=src.map_name,
+                workshop_id=src.workshop_id,
+                cell_x=cx,
+                cell_y=cy,
+                source_file=Path(source_files[k]),
+            )
+            for src, k in zip(srcs, idxs)
+        ]
+        overlaps.append(((cx, cy), cs))
 
     if overlaps:
         # Keep output bounded but useful
@@ -534,25 +712,17 @@ def order_maps(
     return _unique_preserve_order(ordered)
 
 
-def _find_spawnregions_lua(map_dir: Path) -> Optional[Path]:
-    p = map_dir / "spawnregions.lua"
-    return p if p.exists() and p.is_file() else None
-
-
-def _find_spawnpoints_lua(map_dir: Path) -> Optional[Path]:
-    p = map_dir / "spawnpoints.lua"
-    return p if p.exists() and p.is_file() else None
-
-
 def generate_spawnregions_lua(
     *,
     out_path: Path,
     map_names_ordered: Sequence[str],
+    map_dirs: Dict[str, Path],
 ) -> None:
     """
     Generate a server spawnregions lua file.
 
-    For each map, prefer:
+    map_dirs maps each discovered map name to its folder on disk; names without
+    one (e.g. the base map) are skipped. For each map, prefer:
       media/maps/<MapName>/spawnregions.lua
     else fall back to:
       media/maps/<MapName>/spawnpoints.lua
@@ -567,29 +737,24 @@ def generate_spawnregions_lua(
     """
     entries: List[Tuple[str, str]] = []
     for name in map_names_ordered:
-        mdir = Path("media") / "maps" / name
-        sr = _find_spawnregions_lua(
-            Path(out_path.parent.parent) / mdir
-        )  # best-effort; may not exist in this FS
-        if sr is not None:
-            entries.append((name, f"media/maps/{name}/spawnregions.lua"))
-            continue
-        sp = _find_spawnpoints_lua(Path(out_path.parent.parent) / mdir)  # best-effort
-        if sp is not None:
-            entries.append((name, f"media/maps/{name}/spawnpoints.lua"))
+        map_dir = map_dirs.get(name)
+        if map_dir is None:
             continue
+        for lua_name in ("spawnregions.lua", "spawnpoints.lua"):
+            if os.path.isfile(os.path.join(map_dir, lua_name)):
+                entries.append((name, f"media/maps/{name}/{lua_name}"))
+                break
         # If neither exists, skip quietly (map may not provide spawns)
-        continue
 
     # Always generate file; empty entries is valid but not useful.
-    lines = []
-    lines.append("function SpawnRegions()")
-    lines.append("\treturn {")
+    chunks: List[bytes] = []
+    chunks.append(b"function SpawnRegions()\n")
+    chunks.append(b"\treturn {\n")
     for name, file_ in entries:
-        lines.append(f'\t\t{{ name = "{name}", file = "{file_}" }},')
-    lines.append("\t}")
-    lines.append("end")
-    out_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        chunks.append(f'\t\t{{ name = "{name}", file = "{file_}" }},\n'.encode("utf-8"))
+    chunks.append(b"\t}\n")
+    chunks.append(b"end\n")
+    _write_chunks(out_path, chunks)
 
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
@@ -654,8 +819,7 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         _fatal(f"workshop-root not found: {workshop_root}")
 
     plan = _load_json(plan_path)
-    workshop_ids = extract_enabled_workshop_ids(plan)
-    enabled_mod_ids = set(extract_enabled_mod_ids(plan))
+    workshop_ids, enabled_mod_ids = _extract_enabled(plan)
     if not workshop_ids:
         _fatal("no enabled workshop IDs found in registry; cannot scan for map folders")
 
@@ -686,13 +850,16 @@ def main(argv: Optional[Sequence[str]] = None) -> int:
         workshop_ids_in_order=workshop_ids,
     )
 
-    map_csv = ";".join(map_names_ordered)
-    rewrite_ini_map_key(ini_path, map_csv=map_csv)
+    rewrite_ini_map_key(ini_path, map_names=map_names_ordered)
 
     if args.spawnregions_out is not None:
+        map_dirs: Dict[str, Path] = {}
+        for src in map_sources:
+            map_dirs.setdefault(src.map_name, src.map_dir)
         generate_spawnregions_lua(
             out_path=Path(args.spawnregions_out),
             map_names_ordered=map_names_ordered,
+            map_dirs=map_dirs,
         )
         print(f"Wrote spawnregions: {args.spawnregions_out}")
 
@@ -29,7 +29,8 @@ Responsibilities:
   4. Rewrite mods.txt in-place: emit the canonical --- block format. Only
      explicitly listed Mod IDs are kept; sub-mods found on disk but not listed
      in mods.txt are not added automatically.
-  5. Rewrite the `Mods=` and `WorkshopItems=` keys in default.ini.
+  5. Rewrite the `Mods=`, `WorkshopItems=`, `Map=` (and optionally
+     `PublicName=`) keys in default.ini in a single pass.
 
 mods.txt block format::
 
@@ -56,11 +57,16 @@ Planned usage (initializer):
 from __future__ import annotations
 
 import argparse
+import mmap
+import os
 import re
+import shutil
 import sys
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
+from typing import BinaryIO, Iterator
 
 
 # ---------------------------------------------------------------------------
@@ -82,6 +88,12 @@ class ModBlock:
 
     workshop_id: str
     mod_ids: list[str] = field(default_factory=list)
+    # Membership index for mod_ids, so de-duplication while parsing is O(1).
+    _seen: set[str] = field(default_factory=set, repr=False, compare=False)
+
+
+_WORKSHOP_ID_RE = re.compile(r"^workshop\s+id\s*:\s*(\S+)", re.I)
+_MOD_ID_RE = re.compile(r"^mod\s+id\s*:\s*(.+)", re.I)
 
 
 def parse_mods_blocks(path: Path) -> list[ModBlock]:
@@ -106,7 +118,7 @@ def parse_mods_blocks(path: Path) -> list[ModBlock]:
                 current = None
                 continue
 
-            m = re.match(r"(?i)^workshop\s+id\s*:\s*(\S+)", line)
+            m = _WORKSHOP_ID_RE.match(line)
             if m:
                 current = ModBlock(workshop_id=m.group(1))
                 blocks.append(current)
@@ -115,10 +127,13 @@ def parse_mods_blocks(path: Path) -> list[ModBlock]:
             if current is None:
                 continue
 
-            m = re.match(r"(?i)^mod\s+id\s*:\s*(.+)", line)
+            m = _MOD_ID_RE.match(line)
             if m:
-                mid = m.group(1).strip()
-                if mid and mid not in current.mod_ids:
+                # Interned: the same IDs are matched against mod.info IDs in
+                # several sets/dicts downstream.
+                mid = sys.intern(m.group(1).strip())
+                if mid and mid not in current._seen:
+                    current._seen.add(mid)
                     current.mod_ids.append(mid)
                 continue
 
@@ -154,51 +169,165 @@ def parse_mods_txt(path: Path) -> tuple[list[str], list[str]]:
 # ---------------------------------------------------------------------------
 
 
-def _parse_mod_info_file(path: Path) -> dict[str, str]:
-    """Return a lower-cased key→value dict from a single mod.info file."""
+@dataclass(slots=True)
+class ModInfoEntry:
+    """One parsed ``mod.info`` inside a workshop item."""
+
+    path: str
+    info: dict[str, str]
+    tiledef_numbers: list[int]
+    name: str | None  # first ``name=`` value, as shown in conflict labels
+
+
+_TILEDEF_RE = re.compile(r"^tiledef\s*=\s*\S+\s+(\d+)", re.I)
+
+
+def _parse_mod_info_file(path: str) -> ModInfoEntry:
+    """
+    Read a single mod.info once.
+
+    ``info`` is a lower-cased key→value dict (last occurrence wins); the
+    ``tiledef=`` numbers and the first ``name=`` are picked up in the same pass.
+    """
     data: dict[str, str] = {}
-    with path.open(encoding="utf-8", errors="replace") as fh:
+    tiledefs: list[int] = []
+    name: str | None = None
+    with open(path, encoding="utf-8", errors="replace") as fh:
         for line in fh:
-            m = re.match(r"^\s*(\w+)\s*=\s*(.+)", line.rstrip("\r\n"))
-            if m:
-                data[m.group(1).lower()] = m.group(2).strip()
-    return data
+            line = line.rstrip("\r\n")
+            t = _TILEDEF_RE.match(line.strip())
+            if t:
+                tiledefs.append(int(t.group(1)))
+            key, sep, val = line.partition("=")
+            if not sep or not val:
+                continue
+            key = key.strip()
+            # Keys are ``\w+``: str.isalnum() is exactly \w minus the underscore.
+            if key and key.replace("_", "a").isalnum():
+                key = key.lower()
+                data[key] = val.strip()
+                if name is None and key == "name":
+                    name = data[key]
+    return ModInfoEntry(path=path, info=data, tiledef_numbers=tiledefs, name=name)
 
 
-def collect_mod_info(
+@dataclass(slots=True)
+class ItemScan:
+    """Everything the checks below need from one downloaded workshop item."""
+
+    mod_infos: list[ModInfoEntry]
+    lotheader_names: list[str]
+
+
+def _walk_item(item_dir: Path) -> tuple[list[str], list[str]]:
+    """
+    One ``os.scandir`` walk of *item_dir* returning ``(modinfo_paths,
+    lotheader_names)``.
+
+    Mirrors the two ``rglob`` passes it replaces: directories are visited
+    pre-order, symlinked directories are not descended into and unreadable
+    ones are skipped.
+    """
+    modinfo_paths: list[str] = []
+    lotheader_names: list[str] = []
+    stack = [os.fspath(item_dir)]
+    while stack:
+        cur = stack.pop()
+        subdirs: list[str] = []
+        try:
+            with os.scandir(cur) as it:
+                for entry in it:
+                    name = entry.name
+                    if name.endswith(".lotheader"):
+                        lotheader_names.append(name)
+                    elif name == "mod.info" and entry.is_file():
+                        modinfo_paths.append(entry.path)
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+        except PermissionError:
+            continue
+        stack.extend(reversed(subdirs))
+    return modinfo_paths, lotheader_names
+
+
+def _scan_workshop_items(
     workshop_root: Path,
     workshop_ids: list[str],
+) -> dict[str, ItemScan]:
+    """
+    Walk every downloaded workshop item once and parse each ``mod.info`` once.
+
+    Returns ``{workshop_id: ItemScan}`` (mod.info entries in walk order),
+    shared by all the consumers below. Items that are not downloaded are
+    absent.
+    """
+
+    def _scan_one(wid: str) -> ItemScan | None:
+        item_dir = workshop_root / wid
+        if not item_dir.is_dir():
+            return None  # not downloaded yet
+        modinfo_paths, lotheader_names = _walk_item(item_dir)
+        return ItemScan(
+            mod_infos=[_parse_mod_info_file(p) for p in modinfo_paths],
+            lotheader_names=lotheader_names,
+        )
+
+    # Items are independent and the work is stat/read bound, so threads overlap
+    # the filesystem latency; results are stored in workshop_ids order.
+    wids = list(dict.fromkeys(workshop_ids))
+    scan: dict[str, ItemScan] = {}
+    if not wids:
+        return scan
+    workers = min(32, (os.cpu_count() or 1) * 4, len(wids))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        for wid, item in zip(wids, ex.map(_scan_one, wids)):
+            if item is not None:
+                scan[wid] = item
+    return scan
+
+
+def collect_mod_info(
+    scan: dict[str, ItemScan],
+    workshop_ids: list[str],
 ) -> tuple[dict[str, list[str]], dict[str, list[str]]]:
     """
-    Walk each workshop item directory and read every ``mod.info`` found inside.
+    Collect dependency metadata from every ``mod.info`` in *scan*.
 
     Returns a 2-tuple:
       - ``requires_map``     : ``{mod_id: [required_mod_id, ...]}``
       - ``workshop_to_mods`` : ``{workshop_id: [mod_id, ...]}`` (on-disk order)
 
-    Only workshop items whose directories exist under *workshop_root* are
-    visited; missing directories are silently skipped.
+    Only workshop items present in *scan* (downloaded) are visited; missing
+    ones are silently skipped.
     """
     requires: dict[str, list[str]] = {}
     workshop_to_mods: dict[str, list[str]] = {}
     seen_global: set[str] = set()
 
     for wid in workshop_ids:
-        item_dir = workshop_root / wid
-        if not item_dir.is_dir():
+        item = scan.get(wid)
+        if item is None:
             continue  # not downloaded yet
 
         item_mods: list[str] = []
-        for modinfo_path in sorted(item_dir.rglob("mod.info")):
-            info = _parse_mod_info_file(modinfo_path)
-            mod_id = info.get("id", "").strip()
+        # Sorted by path components, which is how the old Path sort ordered
+        # them (a plain str sort would put "a-b/" before "a/").
+        for entry in sorted(item.mod_infos, key=lambda e: e.path.split(os.sep)):
+            info = entry.info
+            mod_id = sys.intern(info.get("id", "").strip())
             if not mod_id:
                 continue
             if mod_id not in seen_global:
                 raw_require = info.get("require", "").strip()
-                deps: list[str] = []
-                if raw_require:
-                    deps = [d.strip() for d in raw_require.split(",") if d.strip()]
+                deps: list[str]
+                if not raw_require:
+                    deps = []
+                elif "," not in raw_require:
+                    # Most mods require zero or one other mod.
+                    deps = [sys.intern(raw_require)]
+                else:
+                    stripped = (p.strip() for p in raw_require.split(","))
+                    deps = [sys.intern(d) for d in stripped if d]
                 requires[mod_id] = deps
                 seen_global.add(mod_id)
             if mod_id not in item_mods:
@@ -222,22 +351,29 @@ VANILLA_MAPS = [
     "West Point, KY",
     "Louisville, KY",
 ]
+VANILLA_MAPS_SET: frozenset[str] = frozenset(VANILLA_MAPS)
 
 
-def _mod_label_for_dir(item_dir: Path) -> str:
-    """Return a human-readable label for a workshop item directory."""
-    modinfo = next(item_dir.rglob("mod.info"), None)
-    if modinfo:
-        for line in modinfo.read_text(encoding="utf-8", errors="replace").splitlines():
-            m = re.match(r"(?i)^\s*name\s*=\s*(.+)", line)
-            if m:
-                return f"{m.group(1).strip()} [{item_dir.name}]"
-    return item_dir.name
+def _build_labels(scan: dict[str, ItemScan]) -> dict[str, str]:
+    """
+    Return ``{workshop_id: label}`` for every scanned item, built once for
+    all the conflict checks. The label is the ``name=`` of the item's first
+    mod.info, e.g. ``"Some Map [1234567]"``, or the bare ID.
+    """
+    labels: dict[str, str] = {}
+    for wid, item in scan.items():
+        entries = item.mod_infos
+        if entries and entries[0].name is not None:
+            labels[wid] = f"{entries[0].name} [{wid}]"
+        else:
+            labels[wid] = wid
+    return labels
 
 
 def check_tiledef_conflicts(
-    workshop_root: Path,
+    scan: dict[str, ItemScan],
     workshop_ids: list[str],
+    labels: dict[str, str],
 ) -> dict[int, list[str]]:
     """
     Returns ``{fileNumber: [mod_label, ...]}`` for numbers claimed by more
@@ -255,28 +391,24 @@ def check_tiledef_conflicts(
     number_to_mods: dict[int, list[str]] = defaultdict(list)
 
     for wid in workshop_ids:
-        item_dir = workshop_root / wid
-        if not item_dir.is_dir():
+        item = scan.get(wid)
+        if item is None:
             continue
-        label = _mod_label_for_dir(item_dir)
+        label = labels[wid]
         seen: set[int] = set()
-        for modinfo_path in item_dir.rglob("mod.info"):
-            for line in modinfo_path.read_text(
-                encoding="utf-8", errors="replace"
-            ).splitlines():
-                m = re.match(r"(?i)^tiledef\s*=\s*\S+\s+(\d+)", line.strip())
-                if m:
-                    num = int(m.group(1))
-                    if num not in seen:
-                        number_to_mods[num].append(label)
-                        seen.add(num)
+        for entry in item.mod_infos:
+            for num in entry.tiledef_numbers:
+                if num not in seen:
+                    number_to_mods[num].append(label)
+                    seen.add(num)
 
     return {n: mods for n, mods in number_to_mods.items() if len(mods) > 1}
 
 
 def check_map_coord_conflicts(
-    workshop_root: Path,
+    scan: dict[str, ItemScan],
     workshop_ids: list[str],
+    labels: dict[str, str],
 ) -> dict[tuple[int, int], list[str]]:
     """
     Returns ``{(cx, cy): [mod_label, ...]}`` for chunk coordinates provided
@@ -285,15 +417,17 @@ def check_map_coord_conflicts(
     coord_to_mods: dict[tuple[int, int], list[str]] = defaultdict(list)
 
     for wid in workshop_ids:
-        item_dir = workshop_root / wid
-        if not item_dir.is_dir():
+        item = scan.get(wid)
+        if item is None:
             continue
-        label = _mod_label_for_dir(item_dir)
+        label = labels[wid]
         seen: set[tuple[int, int]] = set()
-        for lh in item_dir.rglob("*.lotheader"):
-            p = re.match(r"^(\d+)_(\d+)\.lotheader$", lh.name)
-            if p:
-                coord = (int(p.group(1)), int(p.group(2)))
+        for lh_name in item.lotheader_names:
+            # Names are ``<cx>_<cy>.lotheader``; the walk already filtered
+            # on the suffix. isdecimal() is exactly what ``\d`` matches.
+            cx, _, cy = lh_name[:-10].partition("_")
+            if cx.isdecimal() and cy.isdecimal():
+                coord = (int(cx), int(cy))
                 if coord not in seen:
                     coord_to_mods[coord].append(label)
                     seen.add(coord)
@@ -302,7 +436,7 @@ def check_map_coord_conflicts(
 
 
 def collect_workshop_maps(
-    workshop_root: Path,
+    scan: dict[str, ItemScan],
     workshop_ids: list[str],
     active_mod_ids: set[str],
 ) -> list[str]:
@@ -318,16 +452,14 @@ def collect_workshop_maps(
     found: set[str] = set()
     seen_mod_map: set[tuple[str, str]] = set()  # (mod_id, map_name) dedup
     for wid in workshop_ids:
-        item_dir = workshop_root / wid
-        if not item_dir.is_dir():
+        item = scan.get(wid)
+        if item is None:
             continue
-        for modinfo_path in item_dir.rglob("mod.info"):
-            info = _parse_mod_info_file(modinfo_path)
-            mod_id = info.get("id", "").strip()
+        for entry in item.mod_infos:
+            mod_id = entry.info.get("id", "").strip()
             if not mod_id or mod_id not in active_mod_ids:
                 continue
-            mod_root = modinfo_path.parent
-            maps_dir = mod_root / "media" / "maps"
+            maps_dir = Path(os.path.dirname(entry.path), "media", "maps")
             if maps_dir.is_dir():
                 for entry in maps_dir.iterdir():
                     if entry.is_dir() and (mod_id, entry.name) not in seen_mod_map:
@@ -346,7 +478,7 @@ def rewrite_mods_txt(
     workshop_ids: list[str],
     mod_ids_sorted: list[str],
     workshop_to_mods: dict[str, list[str]],
-) -> tuple[bool, list[str]]:
+) -> tuple[bool, list[str], tuple[list[str], list[str]]]:
     """
     Rewrite *mods_txt_path* in the block format::
 
@@ -364,10 +496,12 @@ def rewrite_mods_txt(
     * Orphan mod IDs (not attributable to any on-disk item) are kept at the
       bottom under a comment header.
 
-    Returns ``(changed, validation_warnings)`` where *changed* is ``True`` when
-    the file was overwritten and *validation_warnings* is a list of human-
-    readable strings describing issues found (empty blocks whose workshop item
-    is not yet downloaded).
+    Returns ``(changed, validation_warnings, (workshop_ids, mod_ids))`` where
+    *changed* is ``True`` when the file was overwritten, *validation_warnings*
+    is a list of human-readable strings describing issues found (empty blocks
+    whose workshop item is not yet downloaded), and the last element is what
+    :func:`parse_mods_txt` would now read back from the file (the inputs,
+    unchanged, when nothing was written).
     """
     blocks = parse_mods_blocks(mods_txt_path)
     warnings: list[str] = []
@@ -378,23 +512,19 @@ def rewrite_mods_txt(
         mid: wid for wid, mids in workshop_to_mods.items() for mid in mids
     }
 
-    mod_ids_set = set(mod_ids_sorted)
+    # Topo-sorted position of every enabled mod; doubles as the membership
+    # test for "explicitly enabled in mods.txt".
     sorted_pos = {mid: i for i, mid in enumerate(mod_ids_sorted)}
 
-    def _group_for(wid: str) -> list[str]:
-        """Build the final ordered Mod ID list for *wid*."""
-        cache_mods = workshop_to_mods.get(wid, [])
-        if not cache_mods:
-            return []
-        # Only include mod IDs that are explicitly enabled in mods.txt,
-        # sorted by their topo-sorted position.
-        return sorted(
-            (m for m in cache_mods if m in mod_ids_set),
-            key=lambda m: sorted_pos[m],
-        )
-
     # ── 3. Determine what the rewritten file should look like ─────────────
-    new_groups: dict[str, list[str]] = {wid: _group_for(wid) for wid in workshop_ids}
+    # Per block: only the enabled mod IDs, in topo-sorted order.
+    new_groups: dict[str, list[str]] = {
+        wid: sorted(
+            (m for m in workshop_to_mods.get(wid, ()) if m in sorted_pos),
+            key=sorted_pos.__getitem__,
+        )
+        for wid in workshop_ids
+    }
     new_orphans = [m for m in mod_ids_sorted if m not in mod_to_workshop]
 
     # ── 4. Validation: flag blocks with no enabled Mod IDs ───────────────
@@ -404,7 +534,7 @@ def rewrite_mods_txt(
     for wid in workshop_ids:
         if not new_groups[wid]:
             if workshop_to_mods.get(wid):
-                pass  # shouldn't happen — _group_for covers it
+                pass  # shouldn't happen — new_groups covers it
             elif original_block_mods.get(wid):
                 # Has mod IDs in file but workshop item not downloaded yet — normal
                 pass
@@ -417,10 +547,10 @@ def rewrite_mods_txt(
     # ── 4. Compare against existing state to decide if we need to write ───
     existing: dict[str, list[str]] = {b.workshop_id: b.mod_ids for b in blocks}
     existing_order = [b.workshop_id for b in blocks]
-    existing_orphans: list[str] = []
-    for b in blocks:
-        if b.workshop_id not in set(workshop_ids):
-            existing_orphans.extend(b.mod_ids)
+    workshop_ids_set = set(workshop_ids)
+    existing_orphans = [
+        m for b in blocks if b.workshop_id not in workshop_ids_set for m in b.mod_ids
+    ]
 
     changed = (
         existing_order != workshop_ids
@@ -429,26 +559,43 @@ def rewrite_mods_txt(
     )
 
     if not changed:
-        return False, warnings
+        return False, warnings, (workshop_ids, mod_ids_sorted)
 
     # ── 5. Write the new file ─────────────────────────────────────────────
-    out_lines: list[str] = []
-    for wid in workshop_ids:
-        out_lines.append(f"Workshop ID: {wid}")
-        for mid in new_groups.get(wid, []):
-            out_lines.append(f"Mod ID: {mid}")
-        out_lines.append("---")
-        out_lines.append("")
-
-    if new_orphans:
-        out_lines.append("# Mod IDs not yet attributed to any downloaded workshop item")
-        for mid in new_orphans:
-            out_lines.append(f"Mod ID: {mid}")
-        out_lines.append("---")
-        out_lines.append("")
-
-    mods_txt_path.write_text("\n".join(out_lines).rstrip("\n") + "\n", encoding="utf-8")
-    return True, warnings
+    # Stream blocks straight to a sibling temp file and swap it in, so a crash
+    # mid-write never leaves a truncated mods.txt behind (nor a stray .tmp).
+    tmp_path = mods_txt_path.with_suffix(mods_txt_path.suffix + ".tmp")
+    try:
+        with tmp_path.open("w", encoding="utf-8", buffering=1 << 16) as fh:
+            write = fh.write
+            sep = ""  # blank line between blocks, none after the last one
+            for wid in workshop_ids:
+                write(f"{sep}Workshop ID: {wid}\n")
+                for mid in new_groups[wid]:
+                    write(f"Mod ID: {mid}\n")
+                write("---\n")
+                sep = "\n"
+
+            if new_orphans:
+                write(f"{sep}# Mod IDs not yet attributed to any downloaded workshop item\n")
+                for mid in new_orphans:
+                    write(f"Mod ID: {mid}\n")
+                write("---\n")
+                sep = "\n"
+
+            if not sep:
+                write("\n")
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    _swap_in(tmp_path, mods_txt_path)
+
+    # Orphans sit after a `---` with no `Workshop ID:` line, so reading the file
+    # back only yields the grouped mods.
+    written_mod_ids = list(
+        dict.fromkeys(mid for wid in workshop_ids for mid in new_groups[wid])
+    )
+    return True, warnings, (list(dict.fromkeys(workshop_ids)), written_mod_ids)
 
 
 # ---------------------------------------------------------------------------
@@ -481,7 +628,9 @@ def ensure_topological_order(
       - A required dependency is missing from *mod_ids* entirely.
       - The dependency graph contains a cycle.
     """
-    import heapq
+    # Most PZ mods declare no `require=` at all: nothing to check or reorder.
+    if not any(requires_map.get(mid) for mid in mod_ids):
+        return mod_ids, []
 
     mod_id_set: set[str] = set(mod_ids)
     original_pos: dict[str, int] = {mid: i for i, mid in enumerate(mod_ids)}
@@ -501,36 +650,49 @@ def ensure_topological_order(
             prereqs[mod_id].add(dep)
 
     # Fast check: is the existing order already valid?
-    if all(
-        original_pos[dep] < original_pos[mod_id]
-        for mod_id in mod_ids
-        for dep in prereqs[mod_id]
-    ):
+    in_order = True
+    for mod_id, deps in prereqs.items():
+        pos = original_pos[mod_id]
+        for dep in deps:
+            if original_pos[dep] >= pos:
+                in_order = False
+                break
+        if not in_order:
+            break
+    if in_order:
         return mod_ids, []
 
     # --- Kahn's algorithm with stable original-position tiebreaking ----------
-    in_degree: dict[str, int] = {mid: len(prereqs[mid]) for mid in mod_ids}
-    dependents: dict[str, list[str]] = {mid: [] for mid in mod_ids}
-    for mod_id in mod_ids:
+    # Nodes are indices into mod_ids. Instead of a heap, a cursor tracks the
+    # lowest index that may be ready: everything before it is either emitted
+    # or still blocked, and it only moves back when an emit unblocks an earlier
+    # node. Same picks as a min-heap on original position, and a single
+    # forward sweep when the input is already close to sorted.
+    n = len(mod_ids)
+    in_degree: list[int] = [len(prereqs[mid]) for mid in mod_ids]
+    dependents: list[list[int]] = [[] for _ in range(n)]
+    for i, mod_id in enumerate(mod_ids):
         for dep in prereqs[mod_id]:
-            dependents[dep].append(mod_id)
-
-    heap: list[tuple[int, str]] = [
-        (original_pos[mid], mid) for mid in mod_ids if in_degree[mid] == 0
-    ]
-    heapq.heapify(heap)
+            dependents[original_pos[dep]].append(i)
 
+    emitted = bytearray(n)
     result: list[str] = []
-    while heap:
-        _, mid = heapq.heappop(heap)
-        result.append(mid)
-        for dependent in dependents[mid]:
-            in_degree[dependent] -= 1
-            if in_degree[dependent] == 0:
-                heapq.heappush(heap, (original_pos[dependent], dependent))
+    cursor = 0
+    while cursor < n:
+        if emitted[cursor] or in_degree[cursor]:
+            cursor += 1
+            continue
+        emitted[cursor] = 1
+        result.append(mod_ids[cursor])
+        nxt = cursor + 1
+        for d in dependents[cursor]:
+            in_degree[d] -= 1
+            if in_degree[d] == 0 and d < nxt:
+                nxt = d
+        cursor = nxt
 
     if len(result) != len(mod_ids):
-        cycle_mods = [m for m in mod_ids if m not in set(result)]
+        cycle_mods = [m for i, m in enumerate(mod_ids) if not emitted[i]]
         _fatal(
             f"Dependency cycle detected among {len(cycle_mods)} mod(s): "
             + ", ".join(cycle_mods[:10])
@@ -552,113 +714,124 @@ def ensure_topological_order(
 # ---------------------------------------------------------------------------
 
 
-def update_ini(ini_path: Path, mods_csv: str, workshop_csv: str) -> None:
-    """
-    Rewrite the ``Mods=`` and ``WorkshopItems=`` entries in *ini_path*.
+_INI_KEY_RE = re.compile(rb"([A-Za-z][A-Za-z0-9_]*)\s*=")
 
-    PZ server INI files may span key values across continuation lines (lines
-    that do not start with ``Key=``). This function skips all continuation
-    lines belonging to the two keys being replaced, then rewrites the file
-    in-place.
+# Keys whose old value never spans continuation lines.
+_SINGLE_LINE_KEYS = frozenset({"publicname"})
 
-    If either key is absent from the file it is appended at the end.
+
+def update_ini_keys(ini_path: Path, updates: dict[str, str]) -> None:
     """
-    original = ini_path.read_text(encoding="utf-8", errors="replace")
-    # Strip NUL bytes that occasionally appear in PZ saves
-    if "\x00" in original:
-        original = original.replace("\x00", "")
+    Rewrite every ``Key=`` named in *updates* in a single pass over *ini_path*.
 
-    output_lines: list[str] = []
-    wrote_mods = False
-    wrote_workshop = False
-    skip_continuation = False
-    current_skip_key: str | None = None  # "mods" | "workshop" | None
-
-    def _is_continuation(s: str) -> bool:
-        """A continuation line does not look like a new INI key or blank/comment."""
-        s = s.rstrip("\r\n")
-        return (
-            bool(s)
-            and not s.startswith("#")
-            and not re.match(r"[A-Za-z][A-Za-z0-9_]*\s*=", s)
-        )
+    *updates* maps the canonical key spelling to its new value, e.g.
+    ``{"Mods": ..., "WorkshopItems": ..., "Map": ...}``; keys match
+    case-insensitively.
 
-    for raw in original.splitlines(keepends=True):
-        stripped = raw.rstrip("\r\n")
+    PZ server INI files may span key values across continuation lines (lines
+    that do not start with ``Key=``). The continuation lines of a replaced key
+    are dropped along with its old value (``PublicName=`` is single-line and
+    keeps whatever follows it).
 
-        # While skipping a multi-line old value, eat continuation lines
-        if skip_continuation:
-            if _is_continuation(stripped):
-                continue
-            else:
+    Keys absent from the file are appended at the end, in *updates* order.
+    """
+    targets = {key.lower(): key for key in updates}
+    written: set[str] = set()
+    skip_continuation = False
+    ends_with_newline = True
+
+    tmp_path = ini_path.with_suffix(ini_path.suffix + ".tmp")
+    with ini_path.open("rb") as src, tmp_path.open("wb", buffering=1 << 16) as out:
+        for raw in _iter_ini_lines(src):
+            if not raw.isascii():
+                # Same U+FFFD substitution the old text round-trip applied.
+                raw = raw.decode("utf-8", errors="replace").encode("utf-8")
+            stripped = raw.rstrip(b"\r\n")
+            m = _INI_KEY_RE.match(stripped)
+
+            # While skipping a multi-line old value, eat continuation lines
+            # (anything that is not blank, a comment or a new key).
+            if skip_continuation:
+                if stripped and not stripped.startswith(b"#") and m is None:
+                    continue
                 skip_continuation = False
-                current_skip_key = None
-
-        if re.match(r"(?i)^Mods\s*=", stripped):
-            output_lines.append(f"Mods={mods_csv}\n")
-            wrote_mods = True
-            skip_continuation = True
-            current_skip_key = "mods"
-            continue
-
-        if re.match(r"(?i)^WorkshopItems\s*=", stripped):
-            output_lines.append(f"WorkshopItems={workshop_csv}\n")
-            wrote_workshop = True
-            skip_continuation = True
-            current_skip_key = "workshop"
-            continue
 
-        output_lines.append(raw)
-
-    if not wrote_mods:
-        output_lines.append(f"Mods={mods_csv}\n")
-    if not wrote_workshop:
-        output_lines.append(f"WorkshopItems={workshop_csv}\n")
+            key = m.group(1).decode("ascii").lower() if m else None
+            if key in targets:
+                canonical = targets[key]
+                out.write(f"{canonical}={updates[canonical]}\n".encode("utf-8"))
+                written.add(key)
+                skip_continuation = key not in _SINGLE_LINE_KEYS
+                ends_with_newline = True
+                continue
 
-    ini_path.write_text("".join(output_lines), encoding="utf-8")
+            out.write(raw)
+            ends_with_newline = raw.endswith(b"\n")
 
+        missing = [canonical for key, canonical in targets.items() if key not in written]
+        if missing and not ends_with_newline:
+            out.write(b"\n")  # don't glue the first appended key onto the last line
+        for canonical in missing:
+            out.write(f"{canonical}={updates[canonical]}\n".encode("utf-8"))
 
-# ---------------------------------------------------------------------------
-# Update Map= line in default.ini
-# ---------------------------------------------------------------------------
+    _swap_in(tmp_path, ini_path)
 
 
-def update_map_line(ini_path: Path, map_csv: str) -> None:
+def _swap_in(tmp_path: Path, dest: Path) -> None:
     """
-    Rewrite the ``Map=`` entry in *ini_path* with *map_csv*.
-    Handles multi-line continuation values the same way as ``update_ini``.
-    If ``Map=`` is absent it is appended at the end.
+    Move the finished *tmp_path* over *dest*, keeping *dest*'s permissions and
+    owner.
+
+    A hardlinked *dest* (st_nlink > 1) would be split off from its other
+    names by a rename, ``os.replace`` onto a single-file bind mount fails
+    with EBUSY, and a root-run rewrite of a host-owned file cannot always
+    hand it back to its owner; in all of these cases the new bytes are copied
+    into *dest* in place instead, as the original read/write_text rewrite did.
     """
-    original = ini_path.read_text(encoding="utf-8", errors="replace")
-    if "\x00" in original:
-        original = original.replace("\x00", "")
-
-    def _is_continuation(s: str) -> bool:
-        s = s.rstrip("\r\n")
-        return (
-            bool(s)
-            and not s.startswith("#")
-            and not re.match(r"[A-Za-z][A-Za-z0-9_]*\s*=", s)
-        )
+    st = os.stat(dest)
+    if st.st_nlink == 1:
+        shutil.copymode(dest, tmp_path)
+        try:
+            tmp_st = os.stat(tmp_path)
+            if (tmp_st.st_uid, tmp_st.st_gid) != (st.st_uid, st.st_gid):
+                os.chown(tmp_path, st.st_uid, st.st_gid)
+            os.replace(tmp_path, dest)
+            return
+        except OSError:
+            pass
+    with tmp_path.open("rb") as src, dest.open("wb") as out:
+        shutil.copyfileobj(src, out, 1 << 16)
+    tmp_path.unlink()
+
+
+def _iter_ini_lines(fh: BinaryIO) -> Iterator[bytes]:
+    """
+    Yield the lines of *fh*, newline included, sliced straight out of a
+    read-only memory map instead of a decoded copy of the whole file.
 
-    output_lines: list[str] = []
-    wrote = False
-    skip = False
-    for raw in original.splitlines(keepends=True):
-        stripped = raw.rstrip("\r\n")
-        if skip:
-            if _is_continuation(stripped):
-                continue
-            skip = False
-        if re.match(r"(?i)^Map\s*=", stripped):
-            output_lines.append(f"Map={map_csv}\n")
-            wrote = True
-            skip = True
-            continue
-        output_lines.append(raw)
-    if not wrote:
-        output_lines.append(f"Map={map_csv}\n")
-    ini_path.write_text("".join(output_lines), encoding="utf-8")
+    Line endings are translated to ``\\n`` as text-mode reads do, so CRLF
+    and bare-CR files come out the same as before, and NUL bytes (which
+    occasionally appear in PZ saves) are dropped.
+    """
+    if os.fstat(fh.fileno()).st_size == 0:
+        return  # mmap refuses empty files
+    with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        size = len(mm)
+        # One memchr over the whole map; the common NUL-free file then
+        # never pays for a per-line scan.
+        has_nul = mm.find(b"\x00") != -1
+        start = 0
+        while start < size:
+            end = mm.find(b"\n", start)
+            end = size if end == -1 else end + 1
+            line = mm[start:end]
+            if has_nul:
+                line = line.replace(b"\x00", b"")
+            if b"\r" in line:
+                yield from line.replace(b"\r\n", b"\n").replace(b"\r", b"\n").splitlines(True)
+            elif line:
+                yield line
+            start = end
 
 
 # ---------------------------------------------------------------------------
@@ -676,22 +849,6 @@ def _fatal(msg: str) -> None:
 # ---------------------------------------------------------------------------
 
 
-def update_public_name(ini_path: Path, public_name: str) -> None:
-    """Rewrite or append the ``PublicName=`` key in *ini_path*."""
-    original = ini_path.read_text(encoding="utf-8", errors="replace")
-    output_lines: list[str] = []
-    wrote = False
-    for raw in original.splitlines(keepends=True):
-        if re.match(r"(?i)^PublicName\s*=", raw.rstrip("\r\n")):
-            output_lines.append(f"PublicName={public_name}\n")
-            wrote = True
-        else:
-            output_lines.append(raw)
-    if not wrote:
-        output_lines.append(f"PublicName={public_name}\n")
-    ini_path.write_text("".join(output_lines), encoding="utf-8")
-
-
 def main() -> None:
     ap = argparse.ArgumentParser(
         description="Validate mods.txt and write Mods=/WorkshopItems= into default.ini"
@@ -727,15 +884,17 @@ def main() -> None:
     print(f"mods.txt: {len(workshop_ids)} workshop IDs, {len(mod_ids)} mod IDs")
 
     # --- Step 2: collect mod.info from downloaded items ----------------------
-    requires_map, workshop_to_mods = collect_mod_info(workshop_root, workshop_ids)
+    scan = _scan_workshop_items(workshop_root, workshop_ids)
+    requires_map, workshop_to_mods = collect_mod_info(scan, workshop_ids)
     print(
         f"mod.info: loaded metadata for {len(requires_map)} mod(s) across "
         f"{len(workshop_to_mods)} workshop item(s) on disk"
     )
 
     # --- Step 2b: map conflict checks (fatal on any conflict) ----------------
-    tiledef_conflicts = check_tiledef_conflicts(workshop_root, workshop_ids)
-    map_coord_conflicts = check_map_coord_conflicts(workshop_root, workshop_ids)
+    labels = _build_labels(scan)
+    tiledef_conflicts = check_tiledef_conflicts(scan, workshop_ids, labels)
+    map_coord_conflicts = check_map_coord_conflicts(scan, workshop_ids, labels)
 
     if tiledef_conflicts or map_coord_conflicts:
         if tiledef_conflicts:
@@ -761,8 +920,12 @@ def main() -> None:
         print("Map conflict checks:  OK")
 
     # --- Step 2c: collect workshop-provided maps for Map= --------------------
-    workshop_maps = collect_workshop_maps(workshop_root, workshop_ids, set(mod_ids))
-    vanilla_maps = [v for v in VANILLA_MAPS if v not in set(workshop_maps)]
+    workshop_maps = collect_workshop_maps(scan, workshop_ids, set(mod_ids))
+    if VANILLA_MAPS_SET.isdisjoint(workshop_maps):
+        vanilla_maps = list(VANILLA_MAPS)
+    else:
+        workshop_maps_set = set(workshop_maps)
+        vanilla_maps = [v for v in VANILLA_MAPS if v not in workshop_maps_set]
     all_maps = workshop_maps + vanilla_maps
     print(
         f"Map= will contain {len(all_maps)} maps "
@@ -783,7 +946,7 @@ def main() -> None:
         print("Topological order: OK (stable)")
 
     # --- Step 3b: rewrite mods.txt —
-    changed, val_warnings = rewrite_mods_txt(
+    changed, val_warnings, (workshop_ids, mod_ids) = rewrite_mods_txt(
         mods_txt_path, workshop_ids, mod_ids, workshop_to_mods
     )
     if val_warnings:
@@ -794,27 +957,25 @@ def main() -> None:
         for w in val_warnings:
             print(w)
     if changed:
-        # Re-read after rewrite.
-        workshop_ids, mod_ids = parse_mods_txt(mods_txt_path)
         print(f"Rewrote mods.txt")
 
     # --- Step 4: write INI ---------------------------------------------------
     # PZ expects Mods= entries prefixed with backslash: \modA;\modB;...
-    mods_csv = ";".join(f"\\{m}" for m in mod_ids)
+    # The ';\' separator supplies every backslash but the first.
+    mods_csv = "\\" + ";\\".join(mod_ids) if mod_ids else ""
     workshop_csv = ";".join(workshop_ids)
 
-    update_ini(ini_path, mods_csv, workshop_csv)
+    # Step 4b: dynamic Map=; Step 5 (optional): PublicName. One pass over the INI.
+    updates = {"Mods": mods_csv, "WorkshopItems": workshop_csv, "Map": ";".join(all_maps)}
+    if args.public_name:
+        updates["PublicName"] = args.public_name
+    update_ini_keys(ini_path, updates)
+
     print(
         f"Updated {ini_path}: Mods=({len(mod_ids)} entries), WorkshopItems=({len(workshop_ids)} entries)"
     )
-    # --- Step 4b: write dynamic Map= -----------------------------------------
-    map_csv = ";".join(all_maps)
-    update_map_line(ini_path, map_csv)
     print(f"Updated Map=: {len(all_maps)} entries")
-
-    # --- Step 5 (optional): set PublicName -----------------------------------
     if args.public_name:
-        update_public_name(ini_path, args.public_name)
         print(f"Set PublicName={args.public_name}")
 
 
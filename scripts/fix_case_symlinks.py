@@ -23,53 +23,116 @@ from __future__ import annotations
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
+from typing import Callable, Iterable, Optional
 
 
-def fix_dir(root: Path, *, dry_run: bool = False) -> tuple[int, int]:
+def fix_dir(
+    root: Path,
+    *,
+    dry_run: bool = False,
+    log: Callable[[str], None] = print,
+) -> tuple[int, int]:
     """
     Walk *root* top-down and create lowercase symlinks where needed.
 
+    Per-entry messages go to *log* (``print`` by default).
+
     Returns ``(created, skipped)`` counts.
     """
     created = 0
     skipped = 0
 
-    # os.walk top-down so that when we symlink a directory its contents are
-    # visited by subsequent iterations (the real dir, not the symlink).
-    for dirpath, dirnames, filenames in os.walk(root, followlinks=False):
-        parent = Path(dirpath)
-
-        entries = [(n, True) for n in dirnames] + [(n, False) for n in filenames]
-        for name, is_dir in entries:
-            lower = name.lower()
-            if lower == name:
-                continue  # already lowercase, nothing needed
-
-            link = parent / lower
-            target = parent / name
-
-            if link.exists() or link.is_symlink():
-                # Check it already points to the right place
-                if link.is_symlink() and os.readlink(link) == name:
+    # Top-down, pre-order walk (the order os.walk used) driven by os.scandir,
+    # so the dir/symlink type bits come from the directory read itself. When
+    # we symlink a directory its contents are visited through the real dir,
+    # never through the symlink.
+    stack = [os.fspath(root)]
+    while stack:
+        dirpath = stack.pop()
+        # Mixed-case entries only, as (name, lowercase) pairs: directories
+        # first, then everything else, as os.walk listed them.
+        mixed_dirs: list[tuple[str, str]] = []
+        mixed_files: list[tuple[str, str]] = []
+        subdirs: list[str] = []
+        # name -> is_symlink for everything in this directory; answers the
+        # "does the lowercase name already exist" question without a syscall.
+        present: dict[str, bool] = {}
+        try:
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    name = entry.name
+                    is_link = entry.is_symlink()
+                    present[name] = is_link
+                    if not is_link and entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    lower = name.lower()
+                    if lower == name:
+                        continue  # already lowercase, nothing needed
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    (mixed_dirs if is_dir else mixed_files).append((name, lower))
+        except OSError:
+            continue  # unreadable directory: skip it, as os.walk did
+
+        stack.extend(reversed(subdirs))
+        if not mixed_dirs and not mixed_files:
+            continue  # the common all-lowercase directory
+
+        # Resolve the directory once; the per-entry readlink/symlink calls
+        # below are relative to this fd instead of re-walking the full path.
+        dir_fd = os.open(dirpath, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            for name, lower in mixed_dirs + mixed_files:
+                is_link = present.get(lower)
+                if is_link is not None:
+                    # Check it already points to the right place
+                    target = os.readlink(lower, dir_fd=dir_fd) if is_link else None
+                    if target == name:
+                        skipped += 1
+                        continue
+                    # Exists but wrong target — skip with a warning
+                    log(f"  SKIP (exists, wrong target): {os.path.join(dirpath, lower)} -> {target if is_link else '(real file)'}")
                     skipped += 1
                     continue
-                # Exists but wrong target — skip with a warning
-                print(f"  SKIP (exists, wrong target): {link} -> {os.readlink(link) if link.is_symlink() else '(real file)'}")
-                skipped += 1
-                continue
 
-            if dry_run:
-                print(f"  would create: {link} -> {name}")
-            else:
-                # Symlink target is relative (just the name), so it works
-                # regardless of where the tree is mounted.
-                os.symlink(name, link)
-                created += 1
+                if dry_run:
+                    log(f"  would create: {os.path.join(dirpath, lower)} -> {name}")
+                else:
+                    # Symlink target is relative (just the name), so it works
+                    # regardless of where the tree is mounted.
+                    os.symlink(name, lower, dir_fd=dir_fd)
+                    present[lower] = True
+                    created += 1
+        finally:
+            os.close(dir_fd)
 
     return created, skipped
 
 
+def _fix_root(root: Path, *, dry_run: bool) -> tuple[list[str], int, int]:
+    """Run :func:`fix_dir` on *root*, buffering its messages."""
+    lines: list[str] = []
+    created, skipped = fix_dir(root, dry_run=dry_run, log=lines.append)
+    return lines, created, skipped
+
+
+def _independent_roots(roots: list[Path]) -> bool:
+    """
+    True when every root is an existing directory and none lies inside
+    another, so the walks cannot see each other's symlinks.
+    """
+    if not all(root.is_dir() for root in roots):
+        return False
+    # Component-wise order puts every directory right before its descendants.
+    real = sorted(os.path.realpath(root).split(os.sep) for root in roots)
+    return all(b[: len(a)] != a for a, b in zip(real, real[1:]))
+
+
 def main() -> None:
     import argparse
     ap = argparse.ArgumentParser(description="Create lowercase symlinks for mixed-case mod files")
@@ -77,17 +140,37 @@ def main() -> None:
     ap.add_argument("--dry-run", action="store_true", help="Print what would be done without creating anything")
     args = ap.parse_args()
 
+    roots = [Path(raw) for raw in args.roots]
+    fix_root = partial(_fix_root, dry_run=args.dry_run)
+
+    # Roots are independent, IO-bound walks, so threads overlap the syscalls.
+    # Output is buffered per root and printed in argument order. Overlapping
+    # or missing roots run one at a time, exactly as listed.
+    workers = min(32, (os.cpu_count() or 1) * 4, len(roots))
+    ex: Optional[ThreadPoolExecutor] = None
+    results: Iterable[Optional[tuple[list[str], int, int]]]
+    if workers > 1 and _independent_roots(roots):
+        ex = ThreadPoolExecutor(max_workers=workers)
+        results = ex.map(fix_root, roots)
+    else:
+        results = (fix_root(root) if root.is_dir() else None for root in roots)
+
     total_created = total_skipped = 0
-    for raw in args.roots:
-        root = Path(raw)
-        if not root.is_dir():
-            print(f"SKIP (not a dir): {root}")
-            continue
-        print(f"Processing: {root}")
-        c, s = fix_dir(root, dry_run=args.dry_run)
-        print(f"  {'would create' if args.dry_run else 'created'} {c} symlink(s), {s} already OK")
-        total_created += c
-        total_skipped += s
+    try:
+        for root, result in zip(roots, results):
+            if result is None:
+                print(f"SKIP (not a dir): {root}")
+                continue
+            print(f"Processing: {root}")
+            lines, c, s = result
+            for line in lines:
+                print(line)
+            print(f"  {'would create' if args.dry_run else 'created'} {c} symlink(s), {s} already OK")
+            total_created += c
+            total_skipped += s
+    finally:
+        if ex is not None:
+            ex.shutdown()
 
     print(f"\nTotal: {total_created} created, {total_skipped} skipped")
 
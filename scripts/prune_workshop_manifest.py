@@ -9,54 +9,105 @@ remain, the embedded Steam client may queue re-downloads on next server start.
 Usage:
     python3 prune_workshop_manifest.py <acf_path> <keep_id> [<keep_id> ...]
 
+The init cleanup step loads this file in-process and calls :func:`prune`.
+
 The script rewrites <acf_path> in-place, removing any top-level key blocks
 inside "WorkshopItemsInstalled" and "WorkshopItemDetails" whose ID is not in
 the keep list.
 """
 from __future__ import annotations
 
-import re
+import mmap
+import os
 import sys
 from pathlib import Path
+from typing import Iterable, Iterator, Union
+
+# The manifest is parsed straight off its memory map (or any bytes object).
+_Buffer = Union[bytes, mmap.mmap]
 
+_SECTION_NAMES = (b"WorkshopItemsInstalled", b"WorkshopItemDetails")
 
-def _parse_blocks(lines: list[str], start: int) -> tuple[dict[str, tuple[int, int]], int]:
+
+def _iter_lines(buf: _Buffer, pos: int) -> Iterator[tuple[int, int, bytes]]:
+    """
+    Yield ``(start, end, stripped)`` for each line of *buf* from offset *pos*:
+    the byte span of the line (newline included) and its whitespace-stripped
+    content.
     """
-    Parse a flat level of ``"key" { ... }`` blocks starting just after the
-    opening ``{`` at *start*.  Returns ``(blocks, end_line_idx)`` where
-    *blocks* maps key → (first_line, last_line) inclusive line indices of the
-    entire ``"key" { ... }`` span, and *end_line_idx* is the index of the
-    closing ``}`` of the outer block.
+    size = len(buf)
+    while pos < size:
+        nl = buf.find(b"\n", pos)
+        end = size if nl == -1 else nl + 1
+        yield pos, end, buf[pos:end].strip()
+        pos = end
+
+
+def _quoted(stripped: bytes) -> bytes | None:
+    """Return ``key`` if *stripped* is exactly ``"key"`` (non-empty, no inner quotes)."""
+    if len(stripped) > 2 and stripped[0] == 0x22 and stripped.find(b'"', 1) == len(stripped) - 1:
+        return stripped[1:-1]
+    return None
+
+
+def _parse_blocks(buf: _Buffer, pos: int) -> tuple[dict[str, tuple[int, int]], int]:
+    """
+    Parse a flat level of ``"key" { ... }`` blocks starting at byte offset
+    *pos*, just after the line holding the opening ``{``.  Returns
+    ``(blocks, end)`` where *blocks* maps key → ``(start, end)`` byte span of
+    the entire ``"key" { ... }`` block (whole lines), and *end* is the offset
+    of the line with the closing ``}`` of the outer block.
     """
     blocks: dict[str, tuple[int, int]] = {}
-    i = start
     depth = 0
     current_key: str | None = None
-    block_start: int = 0
-
-    while i < len(lines):
-        line = lines[i].rstrip("\r\n")
-        stripped = line.strip()
+    block_start = 0
+    prev_start = pos
 
-        if stripped == "{":
+    for start, end, stripped in _iter_lines(buf, pos):
+        if stripped == b"{":
             if depth == 0 and current_key is not None:
-                block_start = i - 1  # include the "key" line before {
+                block_start = prev_start  # include the "key" line before {
             depth += 1
-        elif stripped == "}":
+        elif stripped == b"}":
             if depth == 1 and current_key is not None:
-                blocks[current_key] = (block_start, i)
+                blocks[current_key] = (block_start, end)
                 current_key = None
             depth -= 1
             if depth < 0:
-                return blocks, i
+                return blocks, start
         elif depth == 0:
-            m = re.match(r'^\s*"([^"]+)"\s*$', stripped)
-            if m:
-                current_key = m.group(1)
+            key = _quoted(stripped)
+            if key is not None:
+                current_key = key.decode("utf-8", errors="replace")
+        prev_start = start
 
-        i += 1
+    return blocks, len(buf)
 
-    return blocks, i
+
+def _stale_spans(buf: _Buffer, keep_ids: set[str]) -> list[tuple[int, int]]:
+    """Byte spans of the item blocks in *buf* whose ID is not in *keep_ids*."""
+    # Find WorkshopItemsInstalled and WorkshopItemDetails section headers
+    section_ends: dict[bytes, int] = {}
+    for _, end, stripped in _iter_lines(buf, 0):
+        name = _quoted(stripped)
+        if name in _SECTION_NAMES:
+            section_ends[name] = end
+
+    spans: list[tuple[int, int]] = []
+    for header_end in section_ends.values():
+        # Find the opening { of this section
+        for _, open_end, stripped in _iter_lines(buf, header_end):
+            if stripped == b"{":
+                break
+        else:
+            continue
+
+        blocks, _ = _parse_blocks(buf, open_end)
+        for item_id, span in blocks.items():
+            if item_id not in keep_ids:
+                spans.append(span)
+    return spans
 
 
 def prune_acf(acf_path: Path, keep_ids: set[str]) -> bool:
@@ -66,48 +117,44 @@ def prune_acf(acf_path: Path, keep_ids: set[str]) -> bool:
 
     Returns True if the file was modified, False if nothing changed.
     """
-    text = acf_path.read_text(encoding="utf-8", errors="replace")
-    lines = text.splitlines(keepends=True)
-
-    # Find WorkshopItemsInstalled and WorkshopItemDetails section bounds
-    section_starts: dict[str, int] = {}
-    for i, line in enumerate(lines):
-        m = re.match(r'^\s*"(WorkshopItemsInstalled|WorkshopItemDetails)"\s*$', line.strip())
-        if m:
-            section_starts[m.group(1)] = i
-
-    if not section_starts:
-        return False
-
-    # Collect line ranges to delete (sorted descending so we can delete without
-    # shifting indices)
-    ranges_to_delete: list[tuple[int, int]] = []
-
-    for section_name, header_idx in section_starts.items():
-        # Find the opening { of this section
-        open_idx = header_idx + 1
-        while open_idx < len(lines) and lines[open_idx].strip() != "{":
-            open_idx += 1
-        if open_idx >= len(lines):
-            continue
-
-        blocks, _ = _parse_blocks(lines, open_idx + 1)
-        for item_id, (start, end) in blocks.items():
-            if item_id not in keep_ids:
-                ranges_to_delete.append((start, end))
-
-    if not ranges_to_delete:
-        return False
+    with acf_path.open("rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return False  # mmap refuses empty files; nothing to prune anyway
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            spans_to_delete = _stale_spans(buf, keep_ids)
+            if not spans_to_delete:
+                return False
+
+            # One forward pass keeping the bytes between the deleted spans.
+            spans_to_delete.sort()
+            kept: list[bytes] = []
+            cursor = 0
+            for start, end in spans_to_delete:
+                if start > cursor:
+                    kept.append(buf[cursor:start])
+                cursor = max(cursor, end)
+            kept.append(buf[cursor:])
+
+    data = b"".join(kept)
+    # Normalize line endings to LF, as the text-mode rewrite always did
+    if b"\r" in data:
+        data = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    acf_path.write_bytes(data)
+    return True
 
-    # Sort descending so deletions don't shift earlier indices
-    ranges_to_delete.sort(key=lambda r: r[0], reverse=True)
 
-    new_lines = lines[:]
-    for start, end in ranges_to_delete:
-        del new_lines[start:end + 1]
+def prune(acf_path: Path, keep_ids: Iterable[str]) -> bool:
+    """
+    Prune *acf_path* down to *keep_ids* and report the outcome.
 
-    acf_path.write_text("".join(new_lines), encoding="utf-8")
-    return True
+    Returns True if the file was modified.
+    """
+    keep = set(keep_ids)
+    if prune_acf(acf_path, keep):
+        print(f"Pruned stale entries from {acf_path.name} (kept {len(keep)} items)")
+        return True
+    print(f"No stale entries in {acf_path.name}")
+    return False
 
 
 def main() -> None:
@@ -116,16 +163,12 @@ def main() -> None:
         sys.exit(2)
 
     acf_path = Path(sys.argv[1])
-    keep_ids = set(sys.argv[2:])
 
     if not acf_path.exists():
         print(f"ERROR: {acf_path} not found", file=sys.stderr)
         sys.exit(2)
 
-    if prune_acf(acf_path, keep_ids):
-        print(f"Pruned stale entries from {acf_path.name} (kept {len(keep_ids)} items)")
-    else:
-        print(f"No stale entries in {acf_path.name}")
+    prune(acf_path, sys.argv[2:])
 
 
 if __name__ == "__main__":
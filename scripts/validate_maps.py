@@ -20,123 +20,182 @@ Exit codes:
 from __future__ import annotations
 
 import argparse
+import mmap
+import os
 import re
 import sys
 from collections import defaultdict
 from pathlib import Path
+from typing import Callable, Iterator, NamedTuple, Optional, TypeVar
+
+K = TypeVar("K")
 
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
+# Leading ``\s*`` stands in for the line.strip() the callers used to do.
+_WORKSHOP_ID_RE = re.compile(r"\s*workshop\s+id\s*:\s*(\S+)", re.I)
+_MODINFO_NAME_RE = re.compile(r"\s*name\s*=\s*(.+)", re.I)
+_TILEDEF_RE = re.compile(r"\s*tiledef\s*=\s*\S+\s+(\d+)", re.I)
+
+
 def parse_workshop_ids(mods_txt: Path) -> list[str]:
-    ids: list[str] = []
-    seen: set[str] = set()
+    ids: dict[str, None] = {}  # insertion-ordered de-duplication
     with mods_txt.open(encoding="utf-8", errors="replace") as fh:
         for line in fh:
-            m = re.match(r"(?i)^workshop\s+id\s*:\s*(\S+)", line.strip())
+            if ":" not in line:
+                continue  # cheap C-level reject before the regex
+            m = _WORKSHOP_ID_RE.match(line)
             if m:
-                wid = m.group(1)
-                if wid not in seen:
-                    ids.append(wid)
-                    seen.add(wid)
-    return ids
-
-
-def mod_name_for_dir(item_dir: Path) -> str:
-    """Return a human-readable label for a workshop item dir."""
-    modinfo = next(item_dir.rglob("mod.info"), None)
-    if modinfo:
-        for line in modinfo.read_text(encoding="utf-8", errors="replace").splitlines():
-            m = re.match(r"(?i)^\s*name\s*=\s*(.+)", line)
-            if m:
-                return f"{m.group(1).strip()} [{item_dir.name}]"
-    return item_dir.name
+                ids[m.group(1)] = None
+    return list(ids)
 
 
-# ---------------------------------------------------------------------------
-# 1. Tiledef fileNumber conflicts
-# ---------------------------------------------------------------------------
-# PZ tile definition files live at:
-#   media/newtiledefinitions/*.tiles
-#   media/textures/*.pack   (older format — fileNumber in header comment)
-#
-# The fileNumber is encoded in the filename for .tiles files:
-#   2x_<description>_<NNNN>.tiles  →  fileNumber = NNNN
-#   or just  <NNNN>.tiles
-#
-# For .pack files the fileNumber is the numeric prefix before the first "_".
-
-def check_tiledef_conflicts(
-    workshop_root: Path,
-    workshop_ids: list[str],
-) -> dict[int, list[str]]:
+def walk_entries(
+    root: Path,
+    *,
+    descend: Optional[Callable[[os.DirEntry], bool]] = None,
+) -> Iterator[os.DirEntry]:
     """
-    Returns {fileNumber: [mod_label, ...]} for numbers claimed by >1 workshop item.
+    Yield every entry under *root* with an ``os.scandir`` walk.
 
-    PZ B42 declares tiledef fileNumbers inside ``mod.info`` as lines of the form::
+    Same visiting order as ``Path.rglob``: pre-order, a directory's own
+    entries before those of its subdirectories. Symlinked directories are not
+    descended into and unreadable ones are skipped; when given, *descend*
+    vetoes any other subdirectory (it is still yielded).
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        subdirs: list[str] = []
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = list(it)
+        except PermissionError:
+            continue
+        for entry in entries:
+            yield entry
+            if entry.is_dir(follow_symlinks=False) and (descend is None or descend(entry)):
+                subdirs.append(entry.path)
+        stack.extend(reversed(subdirs))
 
-        tiledef=<packName> <number>
 
-    Deduplicates within a single workshop item (42/mod.info vs common/mod.info).
+def _outside_media_or_maps(entry: os.DirEntry) -> bool:
+    """
+    Descend filter for the item walk: inside a ``media`` dir only ``maps`` is
+    entered. Nothing the checks look for lives in ``lua``/``scripts``/
+    ``textures``/``sound``, which are usually the bulk of a mod.
     """
-    number_to_mods: dict[int, list[str]] = defaultdict(list)
+    return entry.name == "maps" or os.path.basename(os.path.dirname(entry.path)) != "media"
 
-    for wid in workshop_ids:
-        item_dir = workshop_root / wid
-        if not item_dir.is_dir():
-            continue
-        label = mod_name_for_dir(item_dir)
-        seen: set[int] = set()
-        for modinfo_path in item_dir.rglob("mod.info"):
-            for line in modinfo_path.read_text(encoding="utf-8", errors="replace").splitlines():
-                m = re.match(r"(?i)^tiledef\s*=\s*\S+\s+(\d+)", line.strip())
-                if m:
-                    num = int(m.group(1))
-                    if num not in seen:
-                        number_to_mods[num].append(label)
-                        seen.add(num)
 
-    return {n: mods for n, mods in number_to_mods.items() if len(mods) > 1}
+class ModScan(NamedTuple):
+    """What the checks below need from the workshop items on disk."""
 
+    labels: dict[str, str]  # wid → label, for every item on disk
+    tiledef_conflicts: dict[int, list[str]]  # fileNumber → labels, if >1
+    coord_conflicts: dict[tuple[int, int], list[str]]  # chunk cell → labels, if >1
+    provided_maps: dict[str, list[str]]  # media/maps/<name> → labels providing it
 
-# ---------------------------------------------------------------------------
-# 2. Map coordinate conflicts
-# ---------------------------------------------------------------------------
-# .lotheader files live at  media/maps/<MapName>/<cx>_<cy>.lotheader
-# where cx, cy are chunk-grid coordinates.
-# Two mods conflict if they both provide a file for the same (cx, cy).
-
-def check_map_conflicts(
-    workshop_root: Path,
-    workshop_ids: list[str],
-) -> dict[tuple[int, int], list[str]]:
+
+def scan_mods(workshop_root: Path, workshop_ids: list[str]) -> ModScan:
     """
-    Returns {(cx, cy): [mod_label, ...]} for chunk coords claimed by >1 mod.
+    Walk every downloaded workshop item once and gather the data for all the
+    checks. Each label appears at most once per key, in workshop_ids order.
+
+    An item's label is the ``name=`` of its first ``mod.info`` in walk order,
+    e.g. ``"Some Map [1234567]"``, or the bare ID.
+
+    B42 declares tiledef fileNumbers inside ``mod.info`` as lines of the form
+    ``tiledef=<packName> <number>``; map chunk cells come from the
+    ``media/maps/<MapName>/<cx>_<cy>.lotheader`` file names.
     """
-    coord_to_mods: dict[tuple[int, int], list[str]] = defaultdict(list)
+    labels: dict[str, str] = {}
+    # Almost every fileNumber / cell has a single owner, so only the first
+    # label is kept per key; a list is built on the second claim only.
+    tiledef_first: dict[int, str] = {}
+    tiledef_extra: dict[int, list[str]] = {}
+    coord_first: dict[tuple[int, int], str] = {}
+    coord_extra: dict[tuple[int, int], list[str]] = {}
+    provided_maps: dict[str, list[str]] = defaultdict(list)
 
     for wid in workshop_ids:
         item_dir = workshop_root / wid
         if not item_dir.is_dir():
-            continue
-        label = mod_name_for_dir(item_dir)
+            continue  # not downloaded yet
+
+        # Per-item keys, insertion-ordered and de-duplicated (42/ vs common/).
+        name: str | None = None
+        seen_modinfo = False
+        item_numbers: dict[int, None] = {}
+        item_coords: dict[tuple[int, int], None] = {}
+        item_maps: dict[str, None] = {}
+
+        for entry in walk_entries(item_dir, descend=_outside_media_or_maps):
+            entry_name = entry.name
+            if entry_name == "mod.info":
+                if not entry.is_file():
+                    continue
+                # Streamed line by line: some mod.info files carry multi-MB
+                # changelogs. The trailing "\n" is absorbed by the patterns.
+                with open(entry.path, encoding="utf-8", errors="replace") as fh:
+                    for line in fh:
+                        if "=" not in line:
+                            continue
+                        m = _TILEDEF_RE.match(line)
+                        if m:
+                            item_numbers[int(m.group(1))] = None
+                        elif not seen_modinfo and name is None:
+                            m = _MODINFO_NAME_RE.match(line)
+                            if m:
+                                name = m.group(1).strip()
+                seen_modinfo = True
+            elif entry_name.endswith(".lotheader"):
+                # <cx>_<cy>.lotheader; isdecimal() accepts exactly what \d does.
+                cx, _, cy = entry_name[:-10].partition("_")
+                if cx.isdecimal() and cy.isdecimal():
+                    item_coords[(int(cx), int(cy))] = None
+            elif entry_name == "media" and entry.is_dir():
+                maps_dir = os.path.join(entry.path, "maps")
+                if os.path.isdir(maps_dir):
+                    with os.scandir(maps_dir) as it:
+                        for map_dir in it:
+                            if map_dir.is_dir():
+                                item_maps[map_dir.name] = None
+
+        label = f"{name} [{wid}]" if name is not None else wid
+        labels[wid] = label
+        for num in item_numbers:
+            if num in tiledef_first:
+                tiledef_extra.setdefault(num, [tiledef_first[num]]).append(label)
+            else:
+                tiledef_first[num] = label
+        for coord in item_coords:
+            if coord in coord_first:
+                coord_extra.setdefault(coord, [coord_first[coord]]).append(label)
+            else:
+                coord_first[coord] = label
+        for map_name in item_maps:
+            provided_maps[map_name].append(label)
+
+    return ModScan(
+        labels,
+        _in_first_seen_order(tiledef_first, tiledef_extra),
+        _in_first_seen_order(coord_first, coord_extra),
+        provided_maps,
+    )
 
-        seen_coords: set[tuple[int, int]] = set()
-        for lh in item_dir.rglob("*.lotheader"):
-            m = re.match(r"^(\d+)_(\d+)\.lotheader$", lh.name)
-            if m:
-                coord = (int(m.group(1)), int(m.group(2)))
-                if coord not in seen_coords:
-                    coord_to_mods[coord].append(label)
-                    seen_coords.add(coord)
 
-    return {c: mods for c, mods in coord_to_mods.items() if len(mods) > 1}
+def _in_first_seen_order(first: dict[K, str], extra: dict[K, list[str]]) -> dict[K, list[str]]:
+    """Reorder the contested keys in *extra* by when each key was first claimed."""
+    if len(extra) < 2:
+        return extra
+    return {key: extra[key] for key in first if key in extra}
 
 
 # ---------------------------------------------------------------------------
-# 3. Map= entry existence check
+# Map= entry existence check
 # ---------------------------------------------------------------------------
 # The server INI Map= key lists map folder names separated by ';'.
 # Each name must be provided by at least one active mod (or be a vanilla map).
@@ -152,35 +211,31 @@ VANILLA_MAPS = {
 }
 
 
-def collect_provided_maps(
-    workshop_root: Path,
-    workshop_ids: list[str],
-) -> dict[str, list[str]]:
-    """
-    Returns {map_folder_name: [mod_label, ...]} for every media/maps/* dir
-    found across all active workshop items.  Each item is counted only once
-    per map name even if it has maps under both 42/ and common/ subdirs.
-    """
-    provided: dict[str, list[str]] = defaultdict(list)
-    for wid in workshop_ids:
-        item_dir = workshop_root / wid
-        if not item_dir.is_dir():
-            continue
-        label = mod_name_for_dir(item_dir)
-        seen: set[str] = set()
-        for maps_dir in item_dir.rglob("media/maps"):
-            if maps_dir.is_dir():
-                for map_dir in maps_dir.iterdir():
-                    if map_dir.is_dir() and map_dir.name not in seen:
-                        provided[map_dir.name].append(label)
-                        seen.add(map_dir.name)
-    return provided
+# First ``Map=`` line, matched straight on the mapped file. Whitespace classes
+# stay within one line so the match never spans a line break.
+_MAP_LINE_RE = re.compile(rb"^[ \t\f\v]*map[ \t\f\v]*=", re.I | re.M)
+
+
+def read_map_entries(ini_path: Path) -> list[str]:
+    """Return the ``;``-separated entries of the first ``Map=`` line in *ini_path*."""
+    with ini_path.open("rb") as fh:
+        try:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return []  # empty file
+        with mm:
+            m = _MAP_LINE_RE.search(mm)
+            if m is None:
+                return []
+            end = mm.find(b"\n", m.end())
+            raw = mm[m.end():end if end != -1 else len(mm)]
+    value = raw.decode("utf-8", errors="replace").strip()
+    return [e.strip() for e in value.split(";") if e.strip()]
 
 
 def check_map_entries(
     ini_path: Path,
-    workshop_root: Path,
-    workshop_ids: list[str],
+    scan: ModScan,
 ) -> tuple[list[str], dict[str, list[str]]]:
     """
     Returns:
@@ -190,18 +245,11 @@ def check_map_entries(
     if not ini_path.exists():
         return [], {}
 
-    map_entries: list[str] = []
-    with ini_path.open(encoding="utf-8", errors="replace") as fh:
-        for line in fh:
-            if re.match(r"(?i)^Map\s*=", line.strip()):
-                raw = line.split("=", 1)[1].strip().rstrip("\r\n")
-                map_entries = [e.strip() for e in raw.split(";") if e.strip()]
-                break
-
+    map_entries = read_map_entries(ini_path)
     if not map_entries:
         return [], {}
 
-    provided = collect_provided_maps(workshop_root, workshop_ids)
+    provided = scan.provided_maps
 
     missing = [
         name for name in map_entries
@@ -254,13 +302,14 @@ def print_map_report(conflicts: dict[tuple[int, int], list[str]]) -> None:
     print(f"\n{'='*60}")
     print(f"MAP COORDINATE CONFLICTS: {len(conflicts)} chunk(s) claimed by multiple mods")
     print(f"{'='*60}")
-    # Group by mod pairs for readability
-    pair_chunks: dict[frozenset, list[tuple[int, int]]] = defaultdict(list)
+    # Group by mod pairs for readability. Labels are unique per item, so the
+    # sorted tuple identifies the same set a frozenset would, hashes cheaper
+    # and is already in print order.
+    pair_chunks: dict[tuple[str, ...], list[tuple[int, int]]] = defaultdict(list)
     for coord, mods in conflicts.items():
-        pair_chunks[frozenset(mods)].append(coord)
+        pair_chunks[tuple(sorted(mods))].append(coord)
 
-    for mod_set, coords in sorted(pair_chunks.items(), key=lambda x: -len(x[1])):
-        mod_list = sorted(mod_set)
+    for mod_list, coords in sorted(pair_chunks.items(), key=lambda x: -len(x[1])):
         print(f"\n  {len(coords)} chunk(s) overlap between:")
         for mod in mod_list:
             print(f"    - {mod}")
@@ -294,23 +343,21 @@ def main() -> None:
         sys.exit(2)
 
     workshop_ids = parse_workshop_ids(mods_txt)
-    on_disk = [wid for wid in workshop_ids if (workshop_root / wid).is_dir()]
-    print(f"Scanning {len(on_disk)}/{len(workshop_ids)} workshop items on disk...")
+    scan = scan_mods(workshop_root, workshop_ids)
+    print(f"Scanning {len(scan.labels)}/{len(workshop_ids)} workshop items on disk...")
 
     found_conflicts = False
 
     if not args.no_tiledef:
-        tiledef_conflicts = check_tiledef_conflicts(workshop_root, workshop_ids)
-        if tiledef_conflicts:
-            print_tiledef_report(tiledef_conflicts)
+        if scan.tiledef_conflicts:
+            print_tiledef_report(scan.tiledef_conflicts)
             found_conflicts = True
         else:
             print("Tiledef fileNumbers: OK (no conflicts)")
 
     if not args.no_map:
-        map_conflicts = check_map_conflicts(workshop_root, workshop_ids)
-        if map_conflicts:
-            print_map_report(map_conflicts)
+        if scan.coord_conflicts:
+            print_map_report(scan.coord_conflicts)
             found_conflicts = True
         else:
             print("Map chunk coords:    OK (no conflicts)")
@@ -318,7 +365,7 @@ def main() -> None:
     if not args.no_mapcheck:
         ini_path = Path(args.ini) if args.ini else None
         if ini_path and ini_path.exists():
-            missing_maps, dup_maps = check_map_entries(ini_path, workshop_root, workshop_ids)
+            missing_maps, dup_maps = check_map_entries(ini_path, scan)
             if missing_maps or dup_maps:
                 print_map_entries_report(missing_maps, dup_maps)
                 if missing_maps:
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Test: per-item exit codes from one batched steamcmd session.
+
+A stub steamcmd prints each item's verdict either on its own line or glued to
+the "Downloading item <id> ..." progress text (as the real client does), and
+steamcmd_download must attribute each verdict to its item regardless of the
+session's own exit code.
+
+Run with:  python -m pytest -q tests/test_download.py
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+INIT_DIR = str(REPO_ROOT / "init")
+if INIT_DIR not in sys.path:
+    sys.path.insert(0, INIT_DIR)
+
+import download  # noqa: E402
+
+STUB_OUTPUT = (
+    "Logging in user 'anonymous' to Steam Public...OK\n"
+    "Downloading item 101 ...\n"
+    "Success. Downloaded item 101 to \"/steam/content/108600/101\" (10 bytes)\n"
+    "Downloading item 102 ...ERROR! Timeout downloading item 102\n"
+    "Downloading item 103 ...Success. Downloaded item 103 to \"/steam/content/108600/103\" (5 bytes)\n"
+    "Downloading item 104 ...\n"
+    "ERROR! Download item 104 failed (Failure).\n"
+)
+
+
+def _stub_steamcmd(tmp_path: Path, exit_code: int) -> str:
+    out = tmp_path / "output.txt"
+    out.write_text(STUB_OUTPUT)
+    stub = tmp_path / "steamcmd.sh"
+    stub.write_text(f"#!/bin/sh\ncat '{out}'\nexit {exit_code}\n")
+    stub.chmod(0o755)
+    return str(stub)
+
+
+def _download(tmp_path: Path, exit_code: int) -> dict[str, int]:
+    return download.steamcmd_download(
+        steamcmd_bin=_stub_steamcmd(tmp_path, exit_code),
+        steamappdir=tmp_path,
+        workshop_appid="108600",
+        steam_login="anonymous",
+        workshop_ids=["101", "102", "103", "104", "105"],
+        timeout_seconds=30,
+    )
+
+
+def test_verdicts_override_successful_session(tmp_path):
+    assert _download(tmp_path, 0) == {"101": 0, "102": 1, "103": 0, "104": 1, "105": 0}
+
+
+def test_verdicts_override_failed_session(tmp_path):
+    assert _download(tmp_path, 5) == {"101": 0, "102": 5, "103": 0, "104": 5, "105": 5}
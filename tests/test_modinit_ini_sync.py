@@ -43,10 +43,14 @@ Usage:
 
 Optional:
   PZ_TEST_INI_FILTER="default.ini,project-mortloid.ini" python3 zomboid/tests/test_modinit_ini_sync.py
+  PZ_TEST_CACHE=1 reuses the resolved registry from a previous run while the
+  resolver, mods.json and import-mods.yml are unchanged (mtime + size).
 """
 
 from __future__ import annotations
 
+import functools
+import hashlib
 import json
 import os
 import re
@@ -54,11 +58,22 @@ import shutil
 import subprocess
 import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Sequence, Set, Tuple
+from typing import AbstractSet, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
-RE_KEYVAL = re.compile(r"^\s*([A-Za-z][A-Za-z0-9_]*)\s*=\s*(.*)\s*$")
+try:
+    import orjson
+except ImportError:  # optional accelerator; stdlib json is the fallback
+    orjson = None
+
+# Mods= / WorkshopItems= lines of a raw INI. Lines may end in \n, \r\n or a
+# lone \r; whitespace around the key is ASCII only.
+RE_MODS_KEYS = re.compile(
+    rb"(?:^|(?<=\r))[ \t\f\v]*(Mods|WorkshopItems)[ \t\f\v]*=([^\r\n]*)",
+    re.MULTILINE,
+)
 
 
 @dataclass(frozen=True)
@@ -67,10 +82,12 @@ class IniMods:
     workshop_items: List[str]
 
 
+@functools.lru_cache(maxsize=1)
 def repo_root() -> Path:
     """
     Resolve repository root by walking up until we find `zomboid/`.
     This script is expected to live at `zomboid/tests/test_modinit_ini_sync.py`.
+    The walk stats each parent, so the result is cached.
     """
     here = Path(__file__).resolve()
     for p in [here.parent, *here.parents]:
@@ -81,7 +98,10 @@ def repo_root() -> Path:
 
 
 def load_json(path: Path) -> dict:
-    return json.loads(path.read_text(encoding="utf-8"))
+    raw = path.read_bytes()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
 
 
 def split_csv(value: str) -> List[str]:
@@ -91,15 +111,10 @@ def split_csv(value: str) -> List[str]:
       - arbitrary whitespace
       - empty entries ignored
     """
-    items: List[str] = []
-    for part in (value or "").split(";"):
-        part = part.strip()
-        if not part:
-            continue
-        if part.startswith("\\"):
-            part = part[1:]
-        items.append(part)
-    return items
+    if not value:
+        return []
+    parts = (part.strip() for part in value.split(";"))
+    return [part[1:] if part[0] == "\\" else part for part in parts if part]
 
 
 def parse_ini_mods(path: Path) -> IniMods:
@@ -110,14 +125,13 @@ def parse_ini_mods(path: Path) -> IniMods:
     mods: Optional[List[str]] = None
     workshop: Optional[List[str]] = None
 
-    for raw in path.read_text(encoding="utf-8", errors="replace").splitlines():
-        m = RE_KEYVAL.match(raw)
-        if not m:
-            continue
-        key, val = m.group(1), m.group(2)
-        if key == "Mods":
+    # One scan over the raw bytes; only the two values are ever decoded.
+    # A later assignment of the same key wins, as with line-by-line parsing.
+    for m in RE_MODS_KEYS.finditer(path.read_bytes()):
+        val = m.group(2).decode("utf-8", errors="replace")
+        if m.group(1) == b"Mods":
             mods = split_csv(val)
-        elif key == "WorkshopItems":
+        else:
             workshop = split_csv(val)
 
     return IniMods(mods=mods or [], workshop_items=workshop or [])
@@ -155,57 +169,82 @@ def registry_by_workshop_id(reg: dict) -> Dict[str, dict]:
     return by_wid
 
 
-def registry_enabled_workshop_ids(reg: dict) -> List[str]:
-    by_wid = registry_by_workshop_id(reg)
+def _wid_sort_key(wid: object) -> Tuple[int, object]:
+    """
+    Numeric workshop IDs by value, then any non-numeric IDs by text.
+
+    The leading tag keeps int and str keys from ever being compared, which
+    raised TypeError on registries mixing the two.
+    """
+    s = str(wid)
+    return (0, int(s)) if s.isdecimal() else (1, s)
+
+
+def _sort_wids(wids: Iterable[str]) -> List[str]:
+    """Sort workshop IDs as `_wid_sort_key` does; all-numeric lists use plain `int`."""
+    wids = list(wids)
+    if all(str(w).isdecimal() for w in wids):
+        return sorted(wids, key=int)
+    return sorted(wids, key=_wid_sort_key)
+
+
+def registry_enabled_workshop_ids(
+    reg: dict, *, by_wid: Optional[Dict[str, dict]] = None
+) -> List[str]:
+    if by_wid is None:
+        by_wid = registry_by_workshop_id(reg)
     out: List[str] = []
     for wid, wentry in by_wid.items():
         enabled = bool((wentry or {}).get("enabled", True))
         if enabled:
             out.append(str(wid))
     # stable numeric sort
-    return sorted(out, key=lambda s: int(s) if s.isdigit() else s)
+    return _sort_wids(out)
 
 
-def registry_enabled_mod_ids(reg: dict) -> List[str]:
+def registry_enabled_mod_ids(
+    reg: dict, *, by_wid: Optional[Dict[str, dict]] = None
+) -> List[str]:
     """
     Derive enabled mod IDs from the consolidated `mods.enabled` list.
     Order: numeric-sort workshop ID, then keep declared modIds order.
+
+    Pass `by_wid` when the caller already has `registry_by_workshop_id(reg)`.
     """
     mods = reg.get("mods")
-    if isinstance(mods, dict):
-        enabled_set = {
-            str(m).strip()
-            for m in (mods.get("enabled") or [])
-            if str(m).strip()
-        }
-    else:
-        enabled_set = set()
-
-    by_wid = registry_by_workshop_id(reg)
-    enabled_wids = sorted(
-        by_wid.keys(), key=lambda s: int(s) if str(s).isdigit() else str(s)
-    )
+    raw_enabled = (mods.get("enabled") if isinstance(mods, dict) else None) or []
+    enabled_set = frozenset(s for s in (str(m).strip() for m in raw_enabled) if s)
 
-    out: List[str] = []
+    if by_wid is None:
+        by_wid = registry_by_workshop_id(reg)
+    enabled_wids = _sort_wids(by_wid)
+
+    # Insertion-ordered dict as an ordered set: O(1) de-duplication.
+    out: Dict[str, None] = {}
     for wid in enabled_wids:
         wentry = by_wid.get(wid) or {}
         if not bool(wentry.get("enabled", True)):
             continue
-        for mid in wentry.get("modIds") or []:
-            if mid and (not enabled_set or mid in enabled_set) and mid not in out:
-                out.append(str(mid))
+        mod_ids = wentry.get("modIds") or []
+        # An empty allowlist admits every mod; test that once, not per mod.
+        if enabled_set:
+            for mid in mod_ids:
+                if mid and mid in enabled_set:
+                    out.setdefault(str(mid), None)
+        else:
+            for mid in mod_ids:
+                if mid:
+                    out.setdefault(str(mid), None)
 
     # Keep explicitly enabled IDs even if discovery metadata is missing.
     for mid in sorted(enabled_set):
-        if mid not in out:
-            out.append(mid)
-    return out
+        out.setdefault(mid, None)
+    return list(out)
 
 
 def collect_ini_files(server_dir: Path) -> List[Path]:
     if not server_dir.is_dir():
         return []
-    inis = sorted(server_dir.glob("*.ini"))
     filt = os.environ.get("PZ_TEST_INI_FILTER", "").strip()
 
     # Default: only validate the primary profile for now
@@ -213,7 +252,14 @@ def collect_ini_files(server_dir: Path) -> List[Path]:
         filt = "project-mortloid.ini"
 
     allow = {s.strip() for s in filt.split(",") if s.strip()}
-    return [p for p in inis if p.name in allow]
+    # The filter is a list of exact names, so stat those instead of listing
+    # and sorting every INI in the directory. Only plain "*.ini" names could
+    # ever match the old glob.
+    return [
+        server_dir / name
+        for name in sorted(allow)
+        if name.endswith(".ini") and os.sep not in name and (server_dir / name).is_file()
+    ]
 
 
 def assert_lists_equal(
@@ -244,19 +290,21 @@ def assert_lists_equal(
 
 
 def assert_subset(
-    label: str, universe: Sequence[str], subset: Sequence[str]
+    label: str, universe: AbstractSet[str], subset: Sequence[str]
 ) -> Optional[str]:
     """
     Returns an error message if `subset` is not a subset of `universe`; otherwise None.
-    Order is ignored (set semantics).
+    Order is ignored (set semantics). `universe` is built once by the caller and
+    shared across INI files.
 
     This is the default comparison mode because multiple INI files may represent
     different server profiles with different mod sets, while the registry is the
     canonical superset of "known/allowed" mods.
     """
-    uni_set, sub_set = set(universe), set(subset)
-    if not sub_set.issubset(uni_set):
-        extra = sorted(sub_set - uni_set)
+    # One probe per INI entry; a set of the subset is only built to report.
+    unknown = [x for x in subset if x not in universe]
+    if unknown:
+        extra = sorted(set(unknown))
         return (
             f"{label} contains entries not present in registry\n"
             f"  unknown/extra ({len(extra)}): {extra}\n"
@@ -264,6 +312,24 @@ def assert_subset(
     return None
 
 
+def resolved_registry_cache_path(inputs: Sequence[Path], *, extra: str = "") -> Path:
+    """
+    Cache file for the resolver's output on `inputs` (path, mtime and size of
+    each) plus `extra`. Lives under `$XDG_CACHE_HOME/pz-init/` (default
+    `~/.cache/pz-init/`).
+
+    Workshop content is not part of the key, hence the opt-in PZ_TEST_CACHE.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for p in inputs:
+        st = p.stat()
+        h.update(f"{p.resolve()}\0{st.st_mtime_ns}\0{st.st_size}\n".encode("utf-8"))
+    h.update(extra.encode("utf-8"))
+    cache_home = os.environ.get("XDG_CACHE_HOME", "").strip()
+    base = Path(cache_home) if cache_home else Path.home() / ".cache"
+    return base / "pz-init" / f"{h.hexdigest()}.json"
+
+
 def run_modinit(
     *,
     resolver_lua: Path,
@@ -316,14 +382,15 @@ def main() -> int:
         return 2
 
     # Create an isolated temp workspace so test doesn't mutate working tree files.
-    with tempfile.TemporaryDirectory(prefix="pz-init-test-") as td:
+    # Prefer tmpfs when available: these files are throwaway and never need to
+    # reach the disk.
+    shm = "/dev/shm"
+    tmp_parent = shm if os.path.isdir(shm) and os.access(shm, os.W_OK) else None
+    with tempfile.TemporaryDirectory(prefix="pz-init-test-", dir=tmp_parent) as td:
         tdir = Path(td)
         mods_yml_tmp = tdir / "import-mods.yml"
         registry_tmp = tdir / "registry.json"
 
-        shutil.copy2(mods_yml_src, mods_yml_tmp)
-        shutil.copy2(registry_src, registry_tmp)
-
         # Workshop root is optional for this test; if not present, resolver still imports.
         # You can point at a real workshop cache via PZ_TEST_WORKSHOP_ROOT.
         ws_root_env = os.environ.get("PZ_TEST_WORKSHOP_ROOT", "").strip()
@@ -335,55 +402,71 @@ def main() -> int:
             )
             ws_root = None
 
-        run_modinit(
-            resolver_lua=resolver_lua,
-            lua_bin=lua_bin,
-            registry_path=registry_tmp,
-            mods_yml_path=mods_yml_tmp,
-            workshop_root=ws_root,
-        )
+        cache_path: Optional[Path] = None
+        if os.environ.get("PZ_TEST_CACHE", "false").lower() in ("1", "true"):
+            cache_path = resolved_registry_cache_path(
+                (resolver_lua, registry_src, mods_yml_src),
+                extra=f"{lua_bin}\0{ws_root or ''}",
+            )
 
-        reg = load_json(registry_tmp)
-        expected_mods = registry_enabled_mod_ids(reg)
-        expected_workshop = registry_enabled_workshop_ids(reg)
+        if cache_path is not None and cache_path.is_file():
+            print(f"Using cached resolver output: {cache_path}")
+            reg = load_json(cache_path)
+        else:
+            # Real copies, not hardlinks or the sources themselves: with --write the
+            # resolver truncates and rewrites both files in place. Only the bytes
+            # are needed, so skip copy2's metadata pass.
+            shutil.copyfile(mods_yml_src, mods_yml_tmp)
+            shutil.copyfile(registry_src, registry_tmp)
+
+            run_modinit(
+                resolver_lua=resolver_lua,
+                lua_bin=lua_bin,
+                registry_path=registry_tmp,
+                mods_yml_path=mods_yml_tmp,
+                workshop_root=ws_root,
+            )
+
+            reg = load_json(registry_tmp)
+            if cache_path is not None:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                staged = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+                shutil.copyfile(registry_tmp, staged)
+                os.replace(staged, cache_path)
+
+        by_wid = registry_by_workshop_id(reg)
+        expected_mods = registry_enabled_mod_ids(reg, by_wid=by_wid)
+        expected_workshop = registry_enabled_workshop_ids(reg, by_wid=by_wid)
+        expected_mods_set = frozenset(expected_mods)
+        expected_workshop_set = frozenset(expected_workshop)
 
         # Compare against each INI
         strict = os.environ.get("PZ_TEST_STRICT_ORDER", "false").lower() == "true"
         expect_exact = os.environ.get("PZ_TEST_EXPECT_EXACT", "false").lower() == "true"
         failures: List[str] = []
 
-        for ini in ini_files:
-            parsed = parse_ini_mods(ini)
-
-            if expect_exact:
-                # Exact match mode (legacy behavior)
-                e1 = assert_lists_equal(
-                    f"{ini.name}: Mods", expected_mods, parsed.mods, strict_order=strict
-                )
-                if e1:
-                    failures.append(e1)
-
-                e2 = assert_lists_equal(
-                    f"{ini.name}: WorkshopItems",
-                    expected_workshop,
-                    parsed.workshop_items,
-                    strict_order=strict,
-                )
-                if e2:
-                    failures.append(e2)
-            else:
-                # Default: each INI must be a subset of the registry superset
-                e1 = assert_subset(f"{ini.name}: Mods", expected_mods, parsed.mods)
-                if e1:
-                    failures.append(e1)
-
-                e2 = assert_subset(
-                    f"{ini.name}: WorkshopItems",
-                    expected_workshop,
-                    parsed.workshop_items,
-                )
-                if e2:
-                    failures.append(e2)
+        # INI reads are independent; overlap them when several are checked.
+        if len(ini_files) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(ini_files))) as ex:
+                parsed_inis = list(ex.map(parse_ini_mods, ini_files))
+        else:
+            parsed_inis = [parse_ini_mods(ini) for ini in ini_files]
+
+        for ini, parsed in zip(ini_files, parsed_inis):
+            checks = (
+                ("Mods", expected_mods, expected_mods_set, parsed.mods),
+                ("WorkshopItems", expected_workshop, expected_workshop_set, parsed.workshop_items),
+            )
+            for key, expected, expected_set, actual in checks:
+                label = f"{ini.name}: {key}"
+                if expect_exact:
+                    # Exact match mode (legacy behavior)
+                    err = assert_lists_equal(label, expected, actual, strict_order=strict)
+                else:
+                    # Default: each INI must be a subset of the registry superset
+                    err = assert_subset(label, expected_set, actual)
+                if err:
+                    failures.append(err)
 
         if failures:
             print("FAIL: INI files are not in sync with registry", file=sys.stderr)
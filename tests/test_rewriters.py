@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Test: INI / ACF / registry rewriters keep their original output byte for byte.
+
+The expected bytes below were produced by the pre-rewrite implementations
+(process_mods.update_ini + update_map_line + update_public_name, the
+read_text/write_text versions of the init/ INI writers and of prune_acf), so
+any drift in line endings, NUL handling or continuation-line dropping shows up
+as a plain bytes mismatch.
+
+Run with:  python -m pytest -q tests/test_rewriters.py
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+for sub in ("", "init", "scripts"):
+    path = str(REPO_ROOT / sub)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+import process_mods  # noqa: E402
+import prune_workshop_manifest  # noqa: E402
+import update_server_ini  # noqa: E402
+import update_server_ini_map  # noqa: E402
+from _registry import save_json  # noqa: E402
+
+
+# ---------------------------------------------------------------------------
+# INI inputs
+# ---------------------------------------------------------------------------
+INI_CRLF = (
+    b"PublicName=Old\r\nMods=\\a;\r\n\\b\r\nWorkshopItems=1;\r\n2\r\n"
+    b"Map=Old;\r\n  Muldraugh, KY\r\nPVP=true\r\n"
+)
+INI_NUL = b"Mo\x00ds=\\a\nWorkshopItems=1\n\x00\nMap=X\nOther=1\x00\n"
+INI_CONT = (
+    b"# header\nmods = \\a;\n\\b;\n\\c\nPVP=true\nMAP=One;\nTwo\n"
+    b"PublicName=P\nextra\nWorkshopItems=\n"
+)
+INI_MISSING = b"PVP=true\n"
+
+
+@pytest.mark.parametrize(
+    "original, expected",
+    [
+        (INI_CRLF, b"PublicName=Srv\nMods=\\m1;\\m2\nWorkshopItems=11;22\nMap=MapA;MapB\nPVP=true\n"),
+        (INI_NUL, b"Mods=\\m1;\\m2\nWorkshopItems=11;22\n\nMap=MapA;MapB\nOther=1\nPublicName=Srv\n"),
+        (INI_CONT, b"# header\nMods=\\m1;\\m2\nPVP=true\nMap=MapA;MapB\nPublicName=Srv\nextra\nWorkshopItems=11;22\n"),
+        (INI_MISSING, b"PVP=true\nMods=\\m1;\\m2\nWorkshopItems=11;22\nMap=MapA;MapB\nPublicName=Srv\n"),
+    ],
+    ids=["crlf", "nul", "continuation", "missing"],
+)
+def test_update_ini_keys(tmp_path, original, expected):
+    ini = tmp_path / "default.ini"
+    ini.write_bytes(original)
+    process_mods.update_ini_keys(
+        ini,
+        {"Mods": "\\m1;\\m2", "WorkshopItems": "11;22", "Map": "MapA;MapB", "PublicName": "Srv"},
+    )
+    assert ini.read_bytes() == expected
+    assert not (tmp_path / "default.ini.tmp").exists()
+
+
+def test_update_ini_keys_keeps_mode_and_hardlink(tmp_path):
+    ini = tmp_path / "default.ini"
+    ini.write_bytes(INI_MISSING)
+    ini.chmod(0o640)
+    link = tmp_path / "linked.ini"
+    os.link(ini, link)
+    process_mods.update_ini_keys(ini, {"Map": "MapA"})
+    assert link.read_bytes() == b"PVP=true\nMap=MapA\n"
+    assert os.stat(ini).st_mode & 0o777 == 0o640
+
+
+def test_rewrite_mods_txt_keeps_mode_and_hardlink(tmp_path):
+    mods_txt = tmp_path / "mods.txt"
+    mods_txt.write_bytes(b"Workshop ID: 1\nMod ID: b\nMod ID: a\n---\n")
+    mods_txt.chmod(0o664)
+    link = tmp_path / "linked.txt"
+    os.link(mods_txt, link)
+    changed, _, _ = process_mods.rewrite_mods_txt(mods_txt, ["1"], ["a", "b"], {"1": ["a", "b"]})
+    assert changed
+    assert link.read_bytes() == b"Workshop ID: 1\nMod ID: a\nMod ID: b\n---\n"
+    assert os.stat(mods_txt).st_mode & 0o777 == 0o664
+    assert not (tmp_path / "mods.txt.tmp").exists()
+
+
+@pytest.mark.parametrize(
+    "original, expected",
+    [
+        (INI_CRLF, b"PublicName=Old\nMods=\\a;\n\\b\nWorkshopItems=1;\n2\nMap=MapA;MapB\nPVP=true\n"),
+        (INI_NUL, b"Mods=\\a\nWorkshopItems=1\n\nMap=MapA;MapB\nOther=1\n"),
+        (INI_CONT, b"# header\nmods = \\a;\n\\b;\n\\c\nPVP=true\nMap=MapA;MapB\nPublicName=P\nextra\nWorkshopItems=\n"),
+        (INI_MISSING, b"PVP=true\nMap=MapA;MapB\n"),
+    ],
+    ids=["crlf", "nul", "continuation", "missing"],
+)
+def test_rewrite_ini_map_key(tmp_path, original, expected):
+    ini = tmp_path / "server.ini"
+    ini.write_bytes(original)
+    update_server_ini_map.rewrite_ini_map_key(ini, map_names=["MapA", "MapB"])
+    assert ini.read_bytes() == expected
+
+
+@pytest.mark.parametrize(
+    "original, expected",
+    [
+        (INI_CRLF, b"PublicName=Old\nMods=\\m1;\\m2\nWorkshopItems=11;22\nMap=MapA;MapB\nPVP=true\n"),
+        (INI_NUL, b"Mods=\\m1;\\m2\nWorkshopItems=11;22\n\nMap=MapA;MapB\nOther=1\n"),
+        (INI_CONT, b"# header\nMods=\\m1;\\m2\nPVP=true\nMap=MapA;MapB\nPublicName=P\nextra\nWorkshopItems=11;22\n"),
+        (INI_MISSING, b"PVP=true\nMods=\\m1;\\m2\nWorkshopItems=11;22\nMap=MapA;MapB\n"),
+    ],
+    ids=["crlf", "nul", "continuation", "missing"],
+)
+def test_rewrite_ini_keys(tmp_path, original, expected):
+    ini = tmp_path / "server.ini"
+    ini.write_bytes(original)
+    update_server_ini.rewrite_ini_keys(
+        ini, mods_csv="\\m1;\\m2", workshop_csv="11;22", map_csv="MapA;MapB"
+    )
+    assert ini.read_bytes() == expected
+
+
+# ---------------------------------------------------------------------------
+# appworkshop_108600.acf pruning
+# ---------------------------------------------------------------------------
+ACF = (
+    '"AppWorkshop"\n{\n\t"appid"\t\t"108600"\n'
+    '\t"WorkshopItemsInstalled"\n\t{\n'
+    '\t\t"100"\n\t\t{\n\t\t\t"size"\t\t"1"\n\t\t}\n'
+    '\t\t"200"\n\t\t{\n\t\t\t"size"\t\t"2"\n\t\t}\n'
+    '\t}\n'
+    '\t"WorkshopItemDetails"\n\t{\n'
+    '\t\t"200"\n\t\t{\n\t\t\t"sub"\n\t\t\t{\n\t\t\t\t"x"\t\t"1"\n\t\t\t}\n\t\t}\n'
+    '\t\t"100"\n\t\t{\n\t\t\t"size"\t\t"1"\n\t\t}\n'
+    '\t}\n}\n'
+)
+ACF_PRUNED = (
+    b'"AppWorkshop"\n{\n\t"appid"\t\t"108600"\n'
+    b'\t"WorkshopItemsInstalled"\n\t{\n'
+    b'\t\t"100"\n\t\t{\n\t\t\t"size"\t\t"1"\n\t\t}\n'
+    b'\t}\n'
+    b'\t"WorkshopItemDetails"\n\t{\n'
+    b'\t\t"100"\n\t\t{\n\t\t\t"size"\t\t"1"\n\t\t}\n'
+    b'\t}\n}\n'
+)
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"], ids=["lf", "crlf"])
+def test_prune_acf(tmp_path, newline):
+    acf = tmp_path / "appworkshop_108600.acf"
+    acf.write_bytes(ACF.replace("\n", newline).encode())
+    assert prune_workshop_manifest.prune_acf(acf, {"100"}) is True
+    assert acf.read_bytes() == ACF_PRUNED
+
+
+@pytest.mark.parametrize("content", [b"", ACF.encode(), ACF.replace("\n", "\r\n").encode()])
+def test_prune_acf_unchanged(tmp_path, content):
+    acf = tmp_path / "appworkshop_108600.acf"
+    acf.write_bytes(content)
+    assert prune_workshop_manifest.prune_acf(acf, {"100", "200"}) is False
+    assert acf.read_bytes() == content
+
+
+# ---------------------------------------------------------------------------
+# mods.json writes
+# ---------------------------------------------------------------------------
+def test_save_json_matches_json_dump_and_skips_unchanged(tmp_path):
+    path = tmp_path / "mods.json"
+    data = {"workshop": {"items": {"1": {"name": "Café", "enabled": True}}}, "n": [1, 2.5, None]}
+    assert save_json(path, data) is True
+    assert path.read_bytes() == (json.dumps(data, indent=2, sort_keys=False) + "\n").encode()
+
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+    assert save_json(path, data) is False
+    assert path.stat().st_mtime_ns == 1_000_000_000
+    assert not (tmp_path / "mods.json.tmp").exists()
+
+    data["n"].append(3)
+    assert save_json(path, data) is True
+    assert json.loads(path.read_bytes()) == data
+
+
+# ---------------------------------------------------------------------------
+# Mods= dependency ordering
+# ---------------------------------------------------------------------------
+def test_ensure_topological_order_keeps_valid_order():
+    assert process_mods.ensure_topological_order(["b", "a"], {"a": ["b"], "b": []}) == (["b", "a"], [])
+
+
+def test_ensure_topological_order_moves_dependencies_first():
+    order, moved = process_mods.ensure_topological_order(
+        ["a", "b", "c"], {"a": ["c"], "c": [], "b": ["not-in-list"]}
+    )
+    assert order == ["b", "c", "a"]
+    assert moved == ["  'a': position 0 → 2", "  'b': position 1 → 0", "  'c': position 2 → 1"]
+
+
+def test_ensure_topological_order_cycle_exits():
+    with pytest.raises(SystemExit) as exc:
+        process_mods.ensure_topological_order(["a", "b", "c"], {"a": ["b"], "b": ["a"], "c": []})
+    assert exc.value.code == 1